@@ -1,29 +1,52 @@
 from logging import getLogger
-from typing import Optional
+from typing import Optional, Union
 
 from core.authentication.auth_middleware import get_current_active_user
 from core.authentication.role import allow_resource_admin
+from core.pagination import MAX_CURSOR_PAGE_SIZE, get_cursor_page
 from core.storage import storage
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from fastapi_pagination.api import pagination_ctx
 from schemas.author import Author, AuthorIn, AuthorUpdate
+from schemas.page import CountedPage, CursorPage
 from schemas.user import User
 
 router = APIRouter()
 
 
-@router.get(path="/authors", response_model=Page[Author])
-def get_authors(name: Optional[str] = None) -> Author:
-    """Get  authors"""
+@router.get(
+    path="/authors",
+    response_model=Union[CountedPage[Author], CursorPage[Author]],
+    dependencies=[Depends(pagination_ctx(CountedPage[Author]))],
+)
+async def get_authors(
+    name: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> Union[CountedPage[Author], CursorPage[Author]]:
+    """
+    Get authors.
+    Pages are numbered unless a limit or a cursor is given, then the
+    page after the cursor is returned with the cursor of the next page
+    """
     logger = getLogger(__name__ + ".get_author")
     try:
         filter = {}
         if name is not None:
             filter["name"] = name
-        authors = storage.author_get_records_page(filter)
-
-        return authors
+        if limit is None and cursor is None:
+            return await storage.author_get_records_page(filter)
+
+        return await get_cursor_page(
+            storage.author_get_all_records,
+            storage.author_count_records,
+            filter,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+        )
 
     except Exception as ex:
         logger.error(ex)
@@ -33,11 +56,11 @@ def get_authors(name: Optional[str] = None) -> Author:
 
 
 @router.get(path="/authors/{author_id}", response_model=Author)
-def get_author(author_id: str) -> Author:
+async def get_author(author_id: str) -> Author:
     """Gets an author by id"""
     logger = getLogger(__name__ + ".get_author")
     try:
-        author = storage.author_verify_record({"_id": author_id})
+        author = await storage.author_verify_record({"_id": author_id})
 
         return author
 
@@ -51,15 +74,13 @@ def get_author(author_id: str) -> Author:
 @router.post(
     path="/authors", response_model=Author, dependencies=[Depends(allow_resource_admin)]
 )
-def add_author(
+async def add_author(
     data: AuthorIn, current_user: User = Depends(get_current_active_user)
 ) -> Author:
     """Creates an author record"""
     logger = getLogger(__name__ + ".add_author")
     try:
-        id = storage.author_create_record(data)
-
-        return storage.author_verify_record({"_id": id})
+        return await storage.author_create_record(data)
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -72,7 +93,7 @@ def add_author(
     response_model=Author,
     dependencies=[Depends(allow_resource_admin)],
 )
-def update_author(
+async def update_author(
     data: AuthorUpdate,
     author_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -82,9 +103,9 @@ def update_author(
     try:
         update = data.model_dump(exclude_unset=True)
 
-        storage.author_update_record(filter={"_id": author_id}, update=update)
-
-        return storage.author_verify_record({"_id": author_id})
+        return await storage.author_update_record(
+            filter={"_id": author_id}, update=update
+        )
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -97,13 +118,13 @@ def update_author(
     response_model=Author,
     dependencies=[Depends(allow_resource_admin)],
 )
-def delete_author(
+async def delete_author(
     author_id: str, current_user: User = Depends(get_current_active_user)
 ) -> Author:
     """deletes an author by id"""
     logger = getLogger(__name__ + ".delete_author")
     try:
-        storage.author_delete_record({"_id": author_id})
+        await storage.author_delete_record({"_id": author_id})
 
         return JSONResponse(
             status_code=status.HTTP_204_NO_CONTENT,
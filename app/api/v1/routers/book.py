@@ -1,29 +1,52 @@
 from logging import getLogger
-from typing import Optional
+from typing import Optional, Union
 
 from core.authentication.auth_middleware import get_current_active_user
 from core.authentication.role import allow_resource_admin
+from core.pagination import MAX_CURSOR_PAGE_SIZE, get_cursor_page
 from core.storage import storage
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from fastapi_pagination.api import pagination_ctx
 from schemas.book import Book, BookIn, BookUpdate
+from schemas.page import CountedPage, CursorPage
 from schemas.user import User
 
 router = APIRouter()
 
 
-@router.get(path="/books", response_model=Page[Book])
-def get_books(title: Optional[str] = None) -> Book:
-    """Get books"""
+@router.get(
+    path="/books",
+    response_model=Union[CountedPage[Book], CursorPage[Book]],
+    dependencies=[Depends(pagination_ctx(CountedPage[Book]))],
+)
+async def get_books(
+    title: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> Union[CountedPage[Book], CursorPage[Book]]:
+    """
+    Get books.
+    Pages are numbered unless a limit or a cursor is given, then the
+    page after the cursor is returned with the cursor of the next page
+    """
     logger = getLogger(__name__ + ".get_book")
     try:
         filter = {}
         if title is not None:
             filter["title"] = title
-        books = storage.book_get_records_page(filter)
-
-        return books
+        if limit is None and cursor is None:
+            return await storage.book_get_records_page(filter)
+
+        return await get_cursor_page(
+            storage.book_get_all_records,
+            storage.book_count_records,
+            filter,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+        )
 
     except Exception as ex:
         logger.error(ex)
@@ -33,11 +56,11 @@ def get_books(title: Optional[str] = None) -> Book:
 
 
 @router.get(path="/books/{book_id}", response_model=Book)
-def get_book(book_id: str) -> Book:
+async def get_book(book_id: str) -> Book:
     """Gets an book by id"""
     logger = getLogger(__name__ + ".get_book")
     try:
-        book = storage.book_verify_record({"_id": book_id})
+        book = await storage.book_verify_record({"_id": book_id})
 
         return book
     except Exception as ex:
@@ -50,15 +73,13 @@ def get_book(book_id: str) -> Book:
 @router.post(
     path="/books", response_model=Book, dependencies=[Depends(allow_resource_admin)]
 )
-def add_book(
+async def add_book(
     data: BookIn, current_user: User = Depends(get_current_active_user)
 ) -> Book:
     """Creates an book record"""
     logger = getLogger(__name__ + ".add_book")
     try:
-        id = storage.book_create_record(data)
-
-        return storage.book_verify_record({"_id": id})
+        return await storage.book_create_record(data)
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -71,7 +92,7 @@ def add_book(
     response_model=Book,
     dependencies=[Depends(allow_resource_admin)],
 )
-def update_book(
+async def update_book(
     data: BookUpdate,
     book_id: str,
     current_user: User = Depends(get_current_active_user),
@@ -81,9 +102,7 @@ def update_book(
     try:
         update = data.model_dump(exclude_unset=True)
 
-        storage.book_update_record(filter={"_id": book_id}, update=update)
-
-        return storage.book_verify_record({"_id": book_id})
+        return await storage.book_update_record(filter={"_id": book_id}, update=update)
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -96,13 +115,13 @@ def update_book(
     response_model=Book,
     dependencies=[Depends(allow_resource_admin)],
 )
-def delete_book(
+async def delete_book(
     book_id: str, current_user: User = Depends(get_current_active_user)
 ) -> Book:
     """deletes an book by id"""
     logger = getLogger(__name__ + ".delete_book")
     try:
-        storage.book_delete_record({"_id": book_id})
+        await storage.book_delete_record({"_id": book_id})
 
         return JSONResponse(
             status_code=status.HTTP_204_NO_CONTENT,
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from core.authentication.role import allow_resource_admin
+from core.config import settings
+from core.export import to_ndjson
+from core.storage import storage
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+router = APIRouter(dependencies=[Depends(allow_resource_admin)])
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+BatchSize = Query(default=settings.EXPORT_BATCH_SIZE, ge=1, le=10000)
+
+
+@router.get(path="/export/authors", response_class=StreamingResponse)
+async def export_authors(batch_size: int = BatchSize) -> StreamingResponse:
+    """Streams all authors as newline delimited json"""
+    batches = storage.author_export_records({}, batch_size=batch_size)
+
+    return StreamingResponse(to_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get(path="/export/books", response_class=StreamingResponse)
+async def export_books(
+    author_id: Optional[str] = None, batch_size: int = BatchSize
+) -> StreamingResponse:
+    """Streams the books, of an author if given, as newline delimited json"""
+    filter = {}
+    if author_id is not None:
+        filter["author_ids"] = author_id
+    batches = storage.book_export_records(filter, batch_size=batch_size)
+
+    return StreamingResponse(to_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get(path="/export/reviews", response_class=StreamingResponse)
+async def export_reviews(
+    book_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    batch_size: int = BatchSize,
+) -> StreamingResponse:
+    """Streams the reviews, of a book or user if given, as newline delimited json"""
+    filter = {}
+    if book_id is not None:
+        filter["book_id"] = book_id
+    if user_id is not None:
+        filter["user_id"] = user_id
+    batches = storage.review_export_records(filter, batch_size=batch_size)
+
+    return StreamingResponse(to_ndjson(batches), media_type=NDJSON_MEDIA_TYPE)
@@ -1,5 +1,6 @@
 from core.config import settings
-from fastapi import APIRouter, responses
+from core.health import health_checks, worst_status
+from fastapi import APIRouter, responses, status
 from schemas.health import Health, Status
 
 router = APIRouter()
@@ -10,14 +11,14 @@ class HealthResponse(responses.JSONResponse):
 
 
 @router.get(
-    "/health",
+    "/health/live",
     response_model=Health,
     response_class=HealthResponse,
-    responses={500: {"model": Health}},
+    response_model_exclude_none=True,
 )
-async def get_health(response: HealthResponse):
-    """API Healt Endpoint"""
-    response.headers["Cache-Control"] = "max-age=3600"
+async def get_liveness(response: HealthResponse):
+    """Reports that the process serves requests, without checking its dependencies"""
+    response.headers["Cache-Control"] = "no-store"
 
     content = {
         "status": Status.PASS,
@@ -26,3 +27,44 @@ async def get_health(response: HealthResponse):
     }
 
     return content
+
+
+@router.get(
+    "/health",
+    response_model=Health,
+    response_class=HealthResponse,
+    response_model_exclude_none=True,
+    responses={503: {"model": Health}},
+)
+@router.get(
+    "/health/ready",
+    response_model=Health,
+    response_class=HealthResponse,
+    response_model_exclude_none=True,
+    responses={503: {"model": Health}},
+)
+async def get_readiness(response: HealthResponse):
+    """
+    Reports whether the process should receive traffic.
+    Fails when the database does not answer and warns when the connection
+    pool, the event loop or the thread pool are saturated
+    """
+    response.headers["Cache-Control"] = "no-store"
+
+    checks = await health_checks.readiness()
+    health_status = worst_status(
+        check.status for component in checks.values() for check in component
+    )
+    if health_status == Status.FAIL:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    elif health_status == Status.WARN:
+        response.status_code = settings.HEALTH_DEGRADED_STATUS_CODE
+
+    content = {
+        "status": health_status,
+        "version": settings.VERSION,
+        "release_id": settings.RELEASE_ID,
+        "checks": checks,
+    }
+
+    return content
@@ -0,0 +1,27 @@
+from core.db_monitoring import pool_monitor
+from core.read_cache import read_cache
+from fastapi import APIRouter
+from graphql_schema.persisted_queries import persisted_queries
+from schemas.metrics import PersistedQueryStats, PoolStats, ReadCacheStats
+
+router = APIRouter()
+
+
+@router.get(
+    path="/metrics/graphql/persisted-queries", response_model=PersistedQueryStats
+)
+async def get_persisted_query_stats() -> PersistedQueryStats:
+    """Gets the persisted query cache counters and the parse and validate time saved"""
+    return persisted_queries.stats()
+
+
+@router.get(path="/metrics/read-cache", response_model=ReadCacheStats)
+async def get_read_cache_stats() -> ReadCacheStats:
+    """Gets the hits and misses of the book, author and review read cache"""
+    return read_cache.stats()
+
+
+@router.get(path="/metrics/db-pool", response_model=PoolStats)
+async def get_pool_stats() -> PoolStats:
+    """Gets the connections of the mongo db pools and the checkout waits"""
+    return pool_monitor.stats()
@@ -1,26 +1,51 @@
 from logging import getLogger
+from typing import Optional, Union
 
 from core.authentication.auth_middleware import get_current_active_user
+from core.pagination import MAX_CURSOR_PAGE_SIZE, get_cursor_page
 from core.storage import storage
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
-from fastapi_pagination import Page
+from fastapi_pagination.api import pagination_ctx
 from schemas import review as p
+from schemas.page import CountedPage, CursorPage
 from schemas.user import User
 
 router = APIRouter()
 
 
-@router.get(path="/books/{book_id}/reviews", response_model=Page[p.Review])
-def get_reviews(book_id: str) -> Page[p.Review]:
-    """Gets the reviews of a book"""
+@router.get(
+    path="/books/{book_id}/reviews",
+    response_model=Union[CountedPage[p.Review], CursorPage[p.Review]],
+    dependencies=[Depends(pagination_ctx(CountedPage[p.Review]))],
+)
+async def get_reviews(
+    book_id: str,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_CURSOR_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> Union[CountedPage[p.Review], CursorPage[p.Review]]:
+    """
+    Gets the reviews of a book.
+    Pages are numbered unless a limit or a cursor is given, then the
+    page after the cursor is returned with the cursor of the next page
+    """
     logger = getLogger(__name__ + ".get_reviews")
     try:
-        storage.book_verify_record({"_id": book_id})
-
-        reviews = storage.review_get_records_page({"book_id": book_id})
-
-        return reviews
+        await storage.book_verify_record({"_id": book_id})
+
+        filter = {"book_id": book_id}
+        if limit is None and cursor is None:
+            return await storage.review_get_records_page(filter)
+
+        return await get_cursor_page(
+            storage.review_get_all_records,
+            storage.review_count_records,
+            filter,
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total,
+        )
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -31,12 +56,12 @@ def get_reviews(book_id: str) -> Page[p.Review]:
 
 
 @router.get(path="/reviews/{review_id}", response_model=p.Review)
-def get_review(review_id: str) -> p.Review:
+async def get_review(review_id: str) -> p.Review:
     """Gets a review by its id"""
     logger = getLogger(__name__ + ".get_review")
     try:
 
-        review = storage.review_verify_record({"_id": review_id})
+        review = await storage.review_verify_record({"_id": review_id})
 
         return review
     except Exception as ex:
@@ -49,7 +74,7 @@ def get_review(review_id: str) -> p.Review:
 
 
 @router.post(path="/books/{book_id}/reviews", response_model=p.Review)
-def add_review(
+async def add_review(
     book_id: str,
     review_data: p.ReviewIn,
     current_user: User = Depends(get_current_active_user),
@@ -57,13 +82,11 @@ def add_review(
     """Adds a review to a book"""
     logger = getLogger(__name__ + ".add_review")
     try:
-        storage.book_verify_record({"_id": book_id})
+        await storage.book_verify_record({"_id": book_id}, projection={"_id": 1})
 
-        id = storage.review_create_record(
+        return await storage.review_create_record(
             review_data=review_data, user_id=current_user.id, book_id=book_id
         )
-
-        return storage.review_verify_record({"_id": id})
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -74,7 +97,7 @@ def add_review(
 
 
 @router.patch(path="/reviews/{review_id}", response_model=p.Review)
-def update_review(
+async def update_review(
     review_id: str,
     review_data: p.ReviewUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -84,11 +107,9 @@ def update_review(
     try:
         update = review_data.model_dump(exclude_unset=True)
 
-        storage.review_update_record(
+        return await storage.review_update_record(
             filter={"_id": review_id, "user_id": current_user.id}, update=update
         )
-
-        return storage.review_verify_record({"_id": review_id})
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -99,7 +120,7 @@ def update_review(
 
 
 @router.delete(path="/reviews/{review_id}")
-def delete_review(
+async def delete_review(
     review_id: str,
     current_user: User = Depends(get_current_active_user),
 ):
@@ -107,7 +128,9 @@ def delete_review(
     logger = getLogger(__name__ + ".delete_review")
     try:
 
-        storage.review_delete_record({"_id": review_id, "user_id": current_user.id})
+        await storage.review_delete_record(
+            {"_id": review_id, "user_id": current_user.id}
+        )
 
         return JSONResponse(
             content={"message": "Review deleted"}, status_code=status.HTTP_202_ACCEPTED
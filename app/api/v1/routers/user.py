@@ -4,6 +4,7 @@ from typing import Dict, Literal
 from core.authentication.auth_middleware import (
     authenticate_user,
     get_current_active_user,
+    hash_new_password,
 )
 from core.authentication.auth_token import create_access_token
 from core.storage import storage
@@ -16,14 +17,16 @@ router = APIRouter()
 
 
 @router.post(path="/register", response_model=UserOut)
-def register_user(input: UserIn) -> UserOut:
+async def register_user(input: UserIn) -> UserOut:
     """Registers a new user"""
     logger = getLogger(__name__ + ".register_user")
 
     try:
-        id = storage.user_create_record(user_data=input, verified=True)
+        password_hash = await hash_new_password(input.password)
 
-        return storage.user_verify_record({"_id": id})
+        return await storage.user_create_record(
+            user_data=input, password_hash=password_hash, verified=True
+        )
 
     except Exception as ex:
         logger.error(ex)
@@ -42,12 +45,12 @@ def register_user(input: UserIn) -> UserOut:
         str,
     ],
 )
-def login_user(input: OAuth2PasswordRequestForm = Depends()) -> UserOut:
+async def login_user(input: OAuth2PasswordRequestForm = Depends()) -> UserOut:
     """Logs in a user"""
     logger = getLogger(__name__ + ".login_user")
 
     try:
-        user = authenticate_user(email=input.username, password=input.password)
+        user = await authenticate_user(email=input.username, password=input.password)
 
         logger.info("User Authenticated")
         if not user.verified:
@@ -87,7 +90,7 @@ def login_user(input: OAuth2PasswordRequestForm = Depends()) -> UserOut:
 
 
 @router.get(path="/users/me", response_model=UserOut)
-def get_user_details(
+async def get_user_details(
     current_user: User = Depends(get_current_active_user),
 ) -> UserOut:
     """Gets the details of the logged in user"""
@@ -0,0 +1,595 @@
+"""
+Replays a weighted mix of REST and GraphQL operations against the app
+running in-process and reports the latency percentiles, throughput,
+storage calls and database commands of every operation.
+
+Storage calls are the calls reaching the storage behind the read cache,
+several DataLoader keys batched in one call count once. Database
+commands are counted by the command monitor of the drivers, mongomock
+sends none so they are only reported with --backend mongod.
+
+The app runs against mongomock, or against a local mongod with
+--backend mongod, on a freshly seeded synthetic dataset so runs on
+different commits are comparable. Results are saved as json and can be
+compared with the results of an earlier run.
+
+Run from the app directory:
+    uv sync --extra benchmarks
+    python -m benchmarks.load --requests 5000 --output results.json
+    python -m benchmarks.load --compare results.json
+"""
+
+import argparse
+import asyncio
+import inspect
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+DEFAULT_MIX = {
+    "graphql_get_books": 30,
+    "graphql_get_reviews": 20,
+    "rest_list_books": 15,
+    "rest_get_book": 10,
+    "rest_list_reviews": 10,
+    "graphql_add_review": 10,
+    "graphql_login_user": 5,
+}
+
+GET_BOOKS = """
+query GetBooks($limit: Int!, $cursor: String) {
+  getBooks(limit: $limit, cursor: $cursor) {
+    items {
+      id
+      title
+      averageRating
+      authors { id name }
+      reviews(first: 5) { nodes { id rating title } }
+    }
+    pageMeta { nextCursor }
+  }
+}
+"""
+
+GET_REVIEWS = """
+query GetReviews($bookId: String!, $limit: Int!) {
+  getReviews(bookId: $bookId, limit: $limit) {
+    items { id rating title content userId }
+    pageMeta { nextCursor }
+  }
+}
+"""
+
+LOGIN_USER = """
+mutation LoginUser($email: String!, $password: String!) {
+  loginUser(authInput: {email: $email, password: $password})
+}
+"""
+
+ADD_REVIEW = """
+mutation AddReview($bookId: String!, $rating: Int!, $title: String!) {
+  addReview(bookId: $bookId, reviewData: {rating: $rating, title: $title}) {
+    id
+    rating
+  }
+}
+"""
+
+PASSWORD = "benchmark-password"
+
+
+class OperationResult(BaseModel):
+    count: int
+    errors: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    storage_calls: float
+    db_commands: Optional[float] = None
+
+
+class BenchmarkResult(BaseModel):
+    commit: Optional[str]
+    date: datetime
+    backend: str
+    database_service: str
+    config: Dict
+    seconds: float
+    throughput: float
+    operations: Dict[str, OperationResult]
+
+
+class StorageCalls:
+    """Storage calls made by the operation being measured"""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+
+storage_calls: ContextVar[Optional[StorageCalls]] = ContextVar(
+    "storage_calls", default=None
+)
+
+
+class CountingStorage:
+    """
+    Counts the calls reaching a storage object for the operation being
+    measured. It wraps the storage behind the read cache so only the
+    calls that go to the database are counted
+    """
+
+    def __init__(self, storage) -> None:
+        self.storage = storage
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.storage, name)
+
+        if not callable(attribute):
+            return attribute
+
+        def method(*args, **kwargs):
+            calls = storage_calls.get()
+            if calls is not None:
+                calls.count += 1
+
+            return attribute(*args, **kwargs)
+
+        return method
+
+
+def use_mongomock() -> None:
+    """Replaces the mongo db drivers with mongomock before the app is imported"""
+    try:
+        import gridfs
+        import mongomock.aggregate
+        import mongomock_motor
+        import motor.motor_asyncio
+        import pymongo.mongo_client
+    except ImportError as ex:
+        sys.exit(f"{ex}. The mongomock backend needs mongomock and mongomock-motor")
+
+    pymongo.mongo_client.MongoClient = mongomock.MongoClient
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    # GridFS is not supported by mongomock and no operation uses it
+    gridfs.GridFS = lambda db: None
+    motor.motor_asyncio.AsyncIOMotorGridFSBucket = lambda db: None
+    # Neither is $unionWith, which reads the pages of several parents
+    mongomock.aggregate._PIPELINE_HANDLERS["$unionWith"] = union_with
+
+
+def union_with(collection: List[Dict], database: Any, options: Dict) -> List[Dict]:
+    """Runs a $unionWith stage for mongomock"""
+    records = database[options["coll"]].aggregate(options.get("pipeline", []))
+
+    return collection + list(records)
+
+
+def get_commit() -> Optional[str]:
+    """Gets the commit the benchmark runs on"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """Parses a mix given as name=weight pairs separated by commas"""
+    mix = {}
+    for pair in value.split(","):
+        name, _, weight = pair.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name}")
+        mix[name] = int(weight)
+
+    return mix
+
+
+def percentile(latencies: List[float], percent: int) -> float:
+    """Gets a percentile of the latencies"""
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0.0
+
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1]
+
+
+class Dataset:
+    """Ids and credentials of the seeded documents"""
+
+    def __init__(self) -> None:
+        self.author_ids: List[str] = []
+        self.book_ids: List[str] = []
+        self.user_ids: List[str] = []
+        self.emails: List[str] = []
+        self.tokens: List[str] = []
+
+
+async def seed(storage, args: argparse.Namespace, rng: random.Random) -> Dataset:
+    """Seeds the synthetic dataset through the storage bulk inserts"""
+    from core.authentication.auth_middleware import hash_new_password
+    from schemas.user import UserIn
+
+    dataset = Dataset()
+    date = datetime.now(UTC)
+    password_hash = await hash_new_password(PASSWORD)
+
+    for index in range(args.users):
+        email = f"reader{index}@benchmark.test"
+        user = await storage.user_create_record(
+            UserIn(username=f"reader{index}", email=email, password=PASSWORD),
+            password_hash=password_hash,
+            verified=True,
+        )
+        dataset.user_ids.append(user.id)
+        dataset.emails.append(email)
+
+    authors = [
+        {
+            "name": f"Author {index}",
+            "bio": "A prolific author " * 10,
+            "date_created": date,
+            "date_modified": date,
+        }
+        for index in range(args.authors)
+    ]
+    await storage.author_insert_records(authors)
+    dataset.author_ids = [str(author["_id"]) for author in authors]
+
+    books = [
+        {
+            "isbn_13": f"{index:013d}",
+            "author_ids": rng.sample(dataset.author_ids, min(2, args.authors)),
+            "title": f"Book {index}",
+            "genres": rng.sample(["fantasy", "mystery", "romance", "history"], 2),
+            "pages": rng.randint(100, 900),
+            "blurb": "A gripping story " * 20,
+            "date_created": date,
+            "date_modified": date,
+        }
+        for index in range(args.books)
+    ]
+    await storage.book_insert_records(books)
+    dataset.book_ids = [str(book["_id"]) for book in books]
+
+    reviews = [
+        {
+            "user_id": rng.choice(dataset.user_ids),
+            "book_id": book_id,
+            "rating": rng.randint(1, 5),
+            "title": "A review",
+            "content": "Thoughts on the book " * 10,
+            "date_created": date,
+            "date_modified": date,
+        }
+        for book_id in dataset.book_ids
+        for _ in range(args.reviews_per_book)
+    ]
+    for start in range(0, len(reviews), 1000):
+        await storage.review_insert_records(reviews[start : start + 1000])
+
+    return dataset
+
+
+class Benchmark:
+    def __init__(
+        self,
+        client,
+        dataset: Dataset,
+        rng: random.Random,
+        count_commands: bool = True,
+    ) -> None:
+        self.client = client
+        self.dataset = dataset
+        self.rng = rng
+        self.count_commands = count_commands
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.storage_calls: Dict[str, int] = defaultdict(int)
+        self.db_commands: Dict[str, int] = defaultdict(int)
+        self.operations: Dict[str, Callable[[], Awaitable[bool]]] = {
+            name: getattr(self, name) for name in DEFAULT_MIX
+        }
+
+    def auth(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.rng.choice(self.dataset.tokens)}"}
+
+    async def graphql(
+        self, query: str, variables: Dict, headers: Optional[Dict] = None
+    ) -> bool:
+        response = await self.client.post(
+            "/graphql", json={"query": query, "variables": variables}, headers=headers
+        )
+
+        return response.status_code == 200 and not response.json().get("errors")
+
+    async def login(self, email: str) -> Tuple[bool, Optional[str]]:
+        response = await self.client.post(
+            "/graphql",
+            json={
+                "query": LOGIN_USER,
+                "variables": {"email": email, "password": PASSWORD},
+            },
+        )
+        body = response.json()
+        if response.status_code != 200 or body.get("errors"):
+            return False, None
+
+        return True, body["data"]["loginUser"]
+
+    async def graphql_get_books(self) -> bool:
+        return await self.graphql(GET_BOOKS, {"limit": 10, "cursor": None})
+
+    async def graphql_get_reviews(self) -> bool:
+        return await self.graphql(
+            GET_REVIEWS,
+            {"bookId": self.rng.choice(self.dataset.book_ids), "limit": 10},
+        )
+
+    async def graphql_login_user(self) -> bool:
+        valid, _ = await self.login(self.rng.choice(self.dataset.emails))
+
+        return valid
+
+    async def graphql_add_review(self) -> bool:
+        return await self.graphql(
+            ADD_REVIEW,
+            {
+                "bookId": self.rng.choice(self.dataset.book_ids),
+                "rating": self.rng.randint(1, 5),
+                "title": "A benchmark review",
+            },
+            headers=self.auth(),
+        )
+
+    async def rest_list_books(self) -> bool:
+        response = await self.client.get("/api/v1/books", params={"limit": 20})
+
+        return response.status_code == 200
+
+    async def rest_get_book(self) -> bool:
+        book_id = self.rng.choice(self.dataset.book_ids)
+        response = await self.client.get(f"/api/v1/books/{book_id}")
+
+        return response.status_code == 200
+
+    async def rest_list_reviews(self) -> bool:
+        book_id = self.rng.choice(self.dataset.book_ids)
+        response = await self.client.get(
+            f"/api/v1/books/{book_id}/reviews", params={"limit": 20}
+        )
+
+        return response.status_code == 200
+
+    async def measure(self, name: str, record: bool) -> None:
+        # Imported with the app, once the settings are in the environment
+        from core.db_monitoring import DBUsage, db_usage
+
+        calls = StorageCalls()
+        usage = DBUsage()
+        token = storage_calls.set(calls)
+        usage_token = db_usage.set(usage)
+        start = perf_counter()
+        try:
+            valid = await self.operations[name]()
+        except Exception:
+            valid = False
+        finally:
+            db_usage.reset(usage_token)
+            storage_calls.reset(token)
+
+        if record:
+            self.latencies[name].append((perf_counter() - start) * 1000)
+            self.storage_calls[name] += calls.count
+            self.db_commands[name] += usage.commands
+            if not valid:
+                self.errors[name] += 1
+
+    async def replay(
+        self, schedule: List[str], concurrency: int, record: bool
+    ) -> float:
+        """Runs the scheduled operations on concurrent workers, returns the seconds"""
+        queue = iter(schedule)
+
+        async def worker():
+            for name in queue:
+                await self.measure(name, record)
+
+        start = perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+        return perf_counter() - start
+
+    def results(self) -> Dict[str, OperationResult]:
+        return {
+            name: OperationResult(
+                count=len(latencies),
+                errors=self.errors[name],
+                mean_ms=statistics.fmean(latencies),
+                p50_ms=percentile(latencies, 50),
+                p95_ms=percentile(latencies, 95),
+                p99_ms=percentile(latencies, 99),
+                storage_calls=self.storage_calls[name] / len(latencies),
+                db_commands=(
+                    self.db_commands[name] / len(latencies)
+                    if self.count_commands
+                    else None
+                ),
+            )
+            for name, latencies in sorted(self.latencies.items())
+        }
+
+
+async def run(args: argparse.Namespace) -> BenchmarkResult:
+    # The app reads its settings when imported and creates its storage
+    # when its lifespan starts
+    import httpx
+    import main
+    from core.config import settings
+    from core.storage import storage
+
+    rng = random.Random(args.seed)
+
+    async with main.app.router.lifespan_context(main.app):
+        backend = storage.storage
+        if args.backend == "mongod":
+            dropped = backend.client.drop_database(settings.DATABSE_NAME)
+            if inspect.isawaitable(dropped):
+                await dropped
+            await backend.sync_indexes()
+
+        dataset = await seed(backend, args, rng)
+        storage.storage = CountingStorage(backend)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            # mongomock does not send the command events of the drivers
+            benchmark = Benchmark(
+                client, dataset, rng, count_commands=args.backend == "mongod"
+            )
+            for email in dataset.emails:
+                _, token = await benchmark.login(email)
+                dataset.tokens.append(token)
+
+            names = list(args.mix)
+            weights = [args.mix[name] for name in names]
+            warmup = rng.choices(names, weights, k=args.warmup)
+            schedule = rng.choices(names, weights, k=args.requests)
+
+            await benchmark.replay(warmup, args.concurrency, record=False)
+            seconds = await benchmark.replay(schedule, args.concurrency, record=True)
+
+    return BenchmarkResult(
+        commit=get_commit(),
+        date=datetime.now(UTC),
+        backend=args.backend,
+        database_service=settings.DATABSE_SERVICE,
+        config={
+            "authors": args.authors,
+            "books": args.books,
+            "reviews_per_book": args.reviews_per_book,
+            "users": args.users,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "mix": args.mix,
+        },
+        seconds=seconds,
+        throughput=args.requests / seconds,
+        operations=benchmark.results(),
+    )
+
+
+def report(result: BenchmarkResult, baseline: Optional[BenchmarkResult]) -> None:
+    print(
+        f"{'operation':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}"
+        + f"{'p95 ms':>10}{'p99 ms':>10}{'storage':>9}{'db cmds':>9}"
+        + ("  p95 vs baseline" if baseline else "")
+    )
+    for name, operation in result.operations.items():
+        line = (
+            f"{name:<22}{operation.count:>7}{operation.errors:>8}"
+            + f"{operation.p50_ms:>10.2f}{operation.p95_ms:>10.2f}"
+            + f"{operation.p99_ms:>10.2f}{operation.storage_calls:>9.1f}"
+            + (
+                f"{operation.db_commands:>9.1f}"
+                if operation.db_commands is not None
+                else f"{'-':>9}"
+            )
+        )
+        previous = baseline.operations.get(name) if baseline else None
+        if previous is not None and previous.p95_ms:
+            line += f"  {(operation.p95_ms / previous.p95_ms - 1) * 100:+.1f}%"
+        print(line)
+
+    print(f"{result.throughput:,.0f} requests/sec over {result.seconds:.1f}s")
+    if baseline:
+        print(f"Baseline {baseline.commit}: {baseline.throughput:,.0f} requests/sec")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend", choices=["mongomock", "mongod"], default="mongomock"
+    )
+    parser.add_argument(
+        "--service",
+        choices=["MOTOR", "MONGO"],
+        default=os.getenv("DATABSE_SERVICE", "MONGO"),
+        help="The storage the app uses",
+    )
+    parser.add_argument(
+        "--database",
+        default="book_reviews_benchmark",
+        help="The database to seed, it is dropped first with --backend mongod",
+    )
+    parser.add_argument("--authors", type=int, default=200)
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--reviews-per-book", type=int, default=5)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Operation weights as name=weight pairs separated by commas",
+    )
+    parser.add_argument(
+        "--log", action="store_true", help="Keep the info logs of the app enabled"
+    )
+    parser.add_argument("--output", help="File the json results are saved to")
+    parser.add_argument("--compare", help="Results of an earlier run to compare to")
+    args = parser.parse_args()
+
+    os.environ["DATABSE_SERVICE"] = args.service
+    os.environ["DATABSE_NAME"] = args.database
+    os.environ["SYNC_INDEXES_ON_STARTUP"] = "false"
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_DAYS", "1")
+    if args.backend == "mongomock":
+        use_mongomock()
+
+    if not args.log:
+        # Logging every request would drown the report
+        logging.disable(logging.INFO)
+
+    result = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = BenchmarkResult.model_validate_json(file.read())
+
+    report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(result.model_dump_json(indent=2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
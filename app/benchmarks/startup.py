@@ -0,0 +1,134 @@
+"""
+Measures the cold start of the app: the time to import it and the time
+its lifespan takes until it serves requests, each in a fresh process.
+
+The median of the runs is reported and compared with the budgets, the
+exit status is 1 when a budget is exceeded so the check can run in CI.
+The startup runs against mongomock, or against a local mongod with
+--backend mongod.
+
+Run from the app directory:
+    uv sync --extra benchmarks
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --import-budget-ms 1500 --startup-budget-ms 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+from typing import Dict, List
+
+from benchmarks.load import use_mongomock
+
+
+async def start_and_stop() -> float:
+    """Imports the app, then times its lifespan until it serves requests"""
+    import main
+
+    start = perf_counter()
+    async with main.app.router.lifespan_context(main.app):
+        started = perf_counter() - start
+
+    return started
+
+
+def measure(stage: str, backend: str) -> Dict[str, float]:
+    """Measures a stage of the start in the current process"""
+    if stage == "import":
+        # Nothing connects on import, so the real drivers are imported
+        start = perf_counter()
+        import main  # noqa: F401
+
+        return {"import_ms": (perf_counter() - start) * 1000}
+
+    if backend == "mongomock":
+        use_mongomock()
+
+    return {"startup_ms": asyncio.run(start_and_stop()) * 1000}
+
+
+def run_fresh(stage: str, backend: str) -> Dict[str, float]:
+    """Measures a stage of the start in a fresh interpreter"""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.startup",
+            "--measure",
+            stage,
+            "--backend",
+            backend,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # The measurement is the last line, the app may log before it
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--backend", choices=["mongomock", "mongod"], default="mongomock"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--import-budget-ms",
+        type=float,
+        help="Fails when the median import time exceeds it",
+    )
+    parser.add_argument(
+        "--startup-budget-ms",
+        type=float,
+        help="Fails when the median lifespan startup time exceeds it",
+    )
+    parser.add_argument(
+        "--measure", choices=["import", "startup"], help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABSE_NAME", "book_reviews_benchmark")
+    os.environ.setdefault("SYNC_INDEXES_ON_STARTUP", "false")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_DAYS", "1")
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.backend)))
+        return 0
+
+    budgets = {
+        "import_ms": args.import_budget_ms,
+        "startup_ms": args.startup_budget_ms,
+    }
+    timings: Dict[str, List[float]] = {"import_ms": [], "startup_ms": []}
+    for _ in range(args.runs):
+        for stage in ["import", "startup"]:
+            for name, value in run_fresh(stage, args.backend).items():
+                timings[name].append(value)
+
+    exceeded = False
+    for name, values in timings.items():
+        median = statistics.median(values)
+        line = f"{name:<12}median {median:>8.1f}  min {min(values):>8.1f}"
+        budget = budgets[name]
+        if budget is not None:
+            line += f"  budget {budget:.0f}"
+            if median > budget:
+                line += "  EXCEEDED"
+                exceeded = True
+        print(line)
+
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
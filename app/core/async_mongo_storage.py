@@ -0,0 +1,1083 @@
+from collections import Counter, defaultdict
+from datetime import UTC, datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from bson.objectid import ObjectId
+from core.authentication.principal_cache import principal_cache
+from core.config import settings
+from core.count_cache import count_cache
+from core.db_monitoring import command_monitor, pool_monitor
+from core.indexes import (
+    INDEXES,
+    IndexReport,
+    compare_indexes,
+    constraint_indexes,
+    log_index_report,
+    missing_indexes,
+)
+from core.mongo_client import (
+    DUPLICATE_KEY_ERROR,
+    catalog_read_preference,
+    client_options,
+)
+from core.pagination import group_pages, pages_pipeline
+from core.ratings import (
+    EMPTY_RATING_AGGREGATES,
+    rating_aggregates,
+    rating_aggregates_pipeline,
+    rating_change_increment,
+    rating_increment,
+    verify_rating,
+)
+from core.request_scope import get_identity_map, reads_from_primary
+from fastapi import status
+from fastapi.exceptions import HTTPException
+from fastapi_pagination.api import create_page
+from fastapi_pagination.utils import verify_params
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorCollection,
+    AsyncIOMotorGridFSBucket,
+)
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from schemas import author as s_author
+from schemas import book as s_book
+from schemas import review as s_review
+from schemas import user as s_user
+from schemas.base import construct_from_document, load_document
+from schemas.page import CountedPage
+
+
+async def insert_unordered(collection, documents: List[Dict]) -> List[Dict]:
+    """
+    Inserts documents in one unordered batch so a failed document does
+    not stop the others. Returns the write errors of the failed documents
+    """
+    try:
+        await collection.insert_many(documents, ordered=False)
+    except BulkWriteError as ex:
+        return ex.details["writeErrors"]
+
+    return []
+
+
+class AsyncMongoStorage:
+    """Storage class for interfacing with mongo db through the asyncio driver"""
+
+    def __init__(self, db_name: str = settings.DATABSE_NAME):
+        """Initializes an AsyncMongoStorage object"""
+
+        self.client = AsyncIOMotorClient(
+            settings.MONGO_URI,
+            event_listeners=[command_monitor, pool_monitor],
+            **client_options(),
+        )
+        self.db = self.client[db_name]
+        self.catalog_db = self.db
+        self.constraints_created = False
+        if settings.MONGO_CATALOG_READ_PREFERENCE != settings.MONGO_READ_PREFERENCE:
+            self.catalog_db = self.client.get_database(
+                db_name, read_preference=catalog_read_preference()
+            )
+        self.fs = AsyncIOMotorGridFSBucket(self.db)
+
+    def catalog(self, collection: str) -> AsyncIOMotorCollection:
+        """
+        Gets a collection for the book, author and review reads.
+        Once the request has written they are read from the primary
+        so it reads its own writes
+        """
+        if reads_from_primary():
+            return self.db[collection]
+
+        return self.catalog_db[collection]
+
+    async def catalog_find_one(
+        self, collection: str, filter: Dict, projection: Optional[Dict]
+    ) -> Optional[Dict]:
+        """
+        Finds a document with the catalog read preference. A document that is
+        not found is looked up on the primary, since it may be too recent to
+        have been replicated
+        """
+        document = await self.catalog(collection).find_one(filter, projection)
+        if document is None and self.catalog_db is not self.db:
+            document = await self.db[collection].find_one(filter, projection)
+
+        return document
+
+    async def ping(self) -> None:
+        """Checks that the database answers, opening a connection if none is open"""
+        await self.client.admin.command("ping")
+
+    async def create_constraint_indexes(self) -> None:
+        """
+        Creates the indexes enforcing constraints, such as the unique
+        user emails. Indexes that already exist are left as they are
+        """
+        for collection in INDEXES:
+            indexes = constraint_indexes(collection)
+            if indexes:
+                await self.db[collection].create_indexes(indexes)
+
+        self.constraints_created = True
+
+    async def sync_indexes(self, build: bool = True) -> List[IndexReport]:
+        """
+        Compares the live indexes with the index registry,
+        building the missing indexes when build is set
+        """
+        reports = []
+
+        for collection in INDEXES:
+            live = await self.db[collection].index_information()
+            report = compare_indexes(collection, live)
+
+            if build and report.missing:
+                report.created = await self.db[collection].create_indexes(
+                    missing_indexes(report)
+                )
+
+            log_index_report(report)
+            reports.append(report)
+
+        return reports
+
+    # users
+    async def user_create_record(
+        self,
+        user_data: s_user.UserIn,
+        password_hash: str,
+        role: s_user.Role = "user",
+        sign_in_type: s_user.SignInType = "NORMAL",
+        verified: bool = False,
+    ) -> s_user.User:
+        """
+        Creates a user record with the hash of its password
+        and returns the created user.
+        A taken email is reported by the unique email index, which is
+        created before the first user when the lifespan has not created it
+        """
+        if not self.constraints_created:
+            await self.create_constraint_indexes()
+
+        users_table = self.db["users"]
+
+        date = datetime.now(UTC)
+        user = user_data.model_dump()
+        user["password"] = password_hash
+        user["role"] = role
+        user["sign_in_type"] = sign_in_type
+        user["verified"] = verified
+        user["status"] = s_user.UserStatus.ENABLED
+        user["date_created"] = date
+        user["date_modified"] = date
+
+        try:
+            await users_table.insert_one(user)
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already taken",
+            )
+        get_identity_map().add("users", user)
+
+        return s_user.User(**user)
+
+    async def user_get_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> Optional[s_user.User]:
+        """Gets a user record from the db using the supplied filter"""
+        users = self.db["users"]
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        identity_map = get_identity_map()
+        user = identity_map.get("users", filter)
+
+        if user is None:
+            user = await users.find_one(filter, projection)
+            if projection is None:
+                identity_map.add("users", user)
+
+        if user:
+            user = load_document(s_user.User, user, projection)
+
+        return user
+
+    async def user_get_all_records(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> List[s_user.User]:
+        """Gets all user records from the db using the supplied filter"""
+        users = self.db["users"]
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        users_list = users.find(filter, projection)
+
+        users_list = [
+            load_document(s_user.User, user, projection) async for user in users_list
+        ]
+
+        return users_list
+
+    async def user_verify_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> s_user.User:
+        """
+        Gets a user record using the filter
+        and raises an error if a matching record is not found
+        """
+
+        user = await self.user_get_record(filter, projection)
+
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        return user
+
+    async def user_update_record(self, filter: Dict, update: Dict) -> s_user.User:
+        """Updates a user record and returns the updated user"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        for key in ["_id", "email"]:
+            if key in update:
+                raise KeyError(f"Invalid Key. KEY {key} cannot be changed")
+        update["date_modified"] = datetime.now(UTC)
+
+        user = await self.db["users"].find_one_and_update(
+            filter, {"$set": update}, return_document=ReturnDocument.AFTER
+        )
+
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        get_identity_map().add("users", user)
+        principal_cache.invalidate(str(user["_id"]))
+
+        return s_user.User(**user)
+
+    async def user_delete_record(self, filter: Dict) -> s_user.User:
+        """Deletes a user record and returns the deleted user"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        user = await self.db["users"].find_one_and_delete(filter)
+
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        get_identity_map().remove("users", {"_id": user["_id"]})
+        principal_cache.invalidate(str(user["_id"]))
+
+        return s_user.User(**user)
+
+    # authors
+    async def author_create_record(
+        self,
+        author_data: s_author.AuthorIn,
+    ) -> s_author.Author:
+        """Creates an author record and returns the created author"""
+
+        authors_table = self.db["authors"]
+
+        date = datetime.now(UTC)
+        author = s_author.Author(
+            name=author_data.name,
+            bio=author_data.bio,
+            date_of_birth=author_data.date_of_birth,
+            gender=author_data.gender,
+            date_created=date,
+            date_modified=date,
+        )
+
+        document = author.model_dump(exclude_unset=True)
+        await authors_table.insert_one(document)
+        get_identity_map().add("authors", document)
+        count_cache.add("authors", document, 1)
+
+        return construct_from_document(s_author.Author, document)
+
+    async def author_insert_records(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Inserts a batch of validated author documents.
+        Returns the write errors of the documents that were not inserted
+        """
+        return await insert_unordered(self.db["authors"], documents)
+
+    async def author_get_ids_by_name(self, names: List[str]) -> Dict[str, str]:
+        """
+        Gets the ids of the authors with the given names.
+        When several authors share a name the first one created is used
+        """
+        authors = (
+            self.db["authors"]
+            .find({"name": {"$in": names}}, {"name": 1})
+            .sort({"_id": ASCENDING})
+        )
+
+        ids = {}
+        async for author in authors:
+            ids.setdefault(author["name"], str(author["_id"]))
+
+        return ids
+
+    async def author_get_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> Optional[s_author.Author]:
+        """Gets a author record from the db using the supplied filter"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        identity_map = get_identity_map()
+        author = identity_map.get("authors", filter)
+
+        if author is None:
+            author = await self.catalog_find_one("authors", filter, projection)
+            if projection is None:
+                identity_map.add("authors", author)
+
+        if author:
+            author = construct_from_document(s_author.Author, author)
+
+        return author
+
+    async def author_get_all_records(
+        self, filter: Dict, limit: int = 0, projection: Optional[Dict] = None
+    ) -> List[s_author.Author]:
+        """Gets all author records from the db using the supplied filter"""
+        authors = self.catalog("authors")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        authors_list = (
+            authors.find(filter, projection).sort({"_id": ASCENDING}).limit(limit)
+        )
+
+        authors_list = [
+            construct_from_document(s_author.Author, author)
+            async for author in authors_list
+        ]
+
+        return authors_list
+
+    async def author_export_records(
+        self, filter: Dict, batch_size: int = 1000
+    ) -> AsyncIterator[List[s_author.Author]]:
+        """
+        Reads the author records matching the filter in batches.
+        Only the current batch is held in memory
+        """
+        authors = self.catalog("authors")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        cursor = authors.find(filter).sort({"_id": ASCENDING}).batch_size(batch_size)
+        while batch := await cursor.to_list(length=batch_size):
+            yield [construct_from_document(s_author.Author, author) for author in batch]
+
+    async def author_get_records_page(
+        self, filter: Dict
+    ) -> CountedPage[s_author.Author]:
+        """
+        Gets a page of author records from the db using the supplied filter.
+        The total is served by author_count_records
+        """
+        authors = self.catalog("authors")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        params, raw_params = verify_params(None, "limit-offset")
+        items = await authors.find(
+            filter, skip=raw_params.offset, limit=raw_params.limit
+        ).to_list(length=raw_params.limit)
+        total, total_exact = await self.author_count_records(filter)
+
+        return create_page(items, total=total, params=params, total_exact=total_exact)
+
+    async def author_count_records(self, filter: Dict) -> Tuple[int, bool]:
+        """
+        Counts the author records matching the supplied filter.
+        Returns the count and whether it is exact, counts of the whole
+        collection are estimated from its metadata and counts of filters
+        are served from the count cache when they are cached
+        """
+        authors = self.db["authors"]
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        if not filter:
+            return await authors.estimated_document_count(), False
+
+        count = count_cache.get("authors", filter)
+        if count is not None:
+            return count, False
+
+        generation = count_cache.generation("authors")
+        count = await authors.count_documents(filter)
+        count_cache.set("authors", filter, count, generation)
+
+        return count, True
+
+    async def author_verify_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> s_author.Author:
+        """
+        Gets a author record using the filter
+        and raises an error if a matching record is not found
+        """
+
+        author = await self.author_get_record(filter, projection)
+
+        if author is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Author not found"
+            )
+
+        return author
+
+    async def author_update_record(self, filter: Dict, update: Dict) -> s_author.Author:
+        """Updates a author record and returns the updated author"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        for key in ["_id"]:
+            if key in update:
+                raise KeyError(f"Invalid Key. KEY {key} cannot be changed")
+        update["date_modified"] = datetime.now(UTC)
+
+        author = await self.db["authors"].find_one_and_update(
+            filter, {"$set": update}, return_document=ReturnDocument.AFTER
+        )
+
+        if author is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Author not found"
+            )
+
+        get_identity_map().add("authors", author)
+        count_cache.invalidate("authors", update)
+
+        return construct_from_document(s_author.Author, author)
+
+    async def author_delete_record(self, filter: Dict) -> s_author.Author:
+        """Deletes a author record and returns the deleted author"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        author = await self.db["authors"].find_one_and_delete(filter)
+
+        if author is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Author not found"
+            )
+
+        get_identity_map().remove("authors", {"_id": author["_id"]})
+        count_cache.add("authors", author, -1)
+
+        return construct_from_document(s_author.Author, author)
+
+    # books
+    async def book_create_record(
+        self,
+        book_data: s_book.BookIn,
+    ) -> s_book.Book:
+        """Creates an book record and returns the created book"""
+        books_table = self.db["books"]
+        date = datetime.now(UTC)
+        book = s_book.Book(
+            isbn_10=book_data.isbn_10,
+            isbn_13=book_data.isbn_13,
+            author_ids=book_data.author_ids,
+            title=book_data.title,
+            genres=book_data.genres,
+            series=book_data.series,
+            series_number=book_data.series_number,
+            pages=book_data.pages,
+            blurb=book_data.blurb,
+            date_created=date,
+            date_modified=date,
+            release_date=book_data.release_date,
+        )
+
+        document = book.model_dump(exclude_unset=True, exclude={"average_rating"})
+        await books_table.insert_one(document)
+        get_identity_map().add("books", document)
+        count_cache.add("books", document, 1)
+
+        return construct_from_document(s_book.Book, document)
+
+    async def book_insert_records(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Inserts a batch of validated book documents.
+        Returns the write errors of the documents that were not inserted
+        """
+        return await insert_unordered(self.db["books"], documents)
+
+    async def book_get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """Gets which of the given ids are the ids of existing books"""
+        books = self.db["books"].find(
+            {"_id": {"$in": [ObjectId(id) for id in ids if ObjectId.is_valid(id)]}},
+            {"_id": 1},
+        )
+
+        return {str(book["_id"]) async for book in books}
+
+    async def book_get_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> Optional[s_book.Book]:
+        """Gets a book record from the db using the supplied filter"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        identity_map = get_identity_map()
+        book = identity_map.get("books", filter)
+
+        if book is None:
+            book = await self.catalog_find_one("books", filter, projection)
+            if projection is None:
+                identity_map.add("books", book)
+
+        if book:
+            book = construct_from_document(s_book.Book, book)
+
+        return book
+
+    async def book_get_all_records(
+        self,
+        filter: Dict,
+        limit: int = 0,
+        projection: Optional[Dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> List[s_book.Book]:
+        """
+        Gets all book records from the db using the supplied filter,
+        in _id order unless a sort is given
+        """
+        books = self.catalog("books")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        books_list = (
+            books.find(filter, projection).sort(sort or {"_id": ASCENDING}).limit(limit)
+        )
+
+        books_list = [
+            construct_from_document(s_book.Book, book) async for book in books_list
+        ]
+
+        return books_list
+
+    async def book_get_pages(
+        self,
+        parent_field: str,
+        parents: List[str],
+        filter: Dict,
+        limit: int,
+        projection: Optional[Dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> Dict[str, List[s_book.Book]]:
+        """
+        Gets the first books of each of several parents with one
+        aggregation, by parent. Each parent is read like a page of its own.
+        The books are in _id order unless a sort is given
+        """
+        if not parents:
+            return {}
+
+        records = self.catalog("books").aggregate(
+            pages_pipeline(
+                "books",
+                parent_field,
+                parents,
+                filter,
+                limit,
+                sort or [("_id", ASCENDING)],
+                projection,
+            )
+        )
+        pages = group_pages([record async for record in records])
+
+        return {
+            parent: [construct_from_document(s_book.Book, book) for book in page]
+            for parent, page in pages.items()
+        }
+
+    async def book_export_records(
+        self, filter: Dict, batch_size: int = 1000
+    ) -> AsyncIterator[List[s_book.Book]]:
+        """
+        Reads the book records matching the filter in batches.
+        Only the current batch is held in memory
+        """
+        books = self.catalog("books")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        cursor = books.find(filter).sort({"_id": ASCENDING}).batch_size(batch_size)
+        while batch := await cursor.to_list(length=batch_size):
+            yield [construct_from_document(s_book.Book, book) for book in batch]
+
+    async def book_get_records_page(self, filter: Dict) -> CountedPage[s_book.Book]:
+        """
+        Gets a page of book records from the db using the supplied filter.
+        The total is served by book_count_records
+        """
+        books = self.catalog("books")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        params, raw_params = verify_params(None, "limit-offset")
+        items = await books.find(
+            filter, skip=raw_params.offset, limit=raw_params.limit
+        ).to_list(length=raw_params.limit)
+        total, total_exact = await self.book_count_records(filter)
+
+        return create_page(items, total=total, params=params, total_exact=total_exact)
+
+    async def book_count_records(self, filter: Dict) -> Tuple[int, bool]:
+        """
+        Counts the book records matching the supplied filter.
+        Returns the count and whether it is exact, counts of the whole
+        collection are estimated from its metadata and counts of filters
+        are served from the count cache when they are cached
+        """
+        books = self.db["books"]
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        if not filter:
+            return await books.estimated_document_count(), False
+
+        count = count_cache.get("books", filter)
+        if count is not None:
+            return count, False
+
+        generation = count_cache.generation("books")
+        count = await books.count_documents(filter)
+        count_cache.set("books", filter, count, generation)
+
+        return count, True
+
+    async def book_verify_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> s_book.Book:
+        """
+        Gets a book record using the filter
+        and raises an error if a matching record is not found
+        """
+
+        book = await self.book_get_record(filter, projection)
+
+        if book is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+            )
+
+        return book
+
+    async def book_update_record(self, filter: Dict, update: Dict) -> s_book.Book:
+        """Updates a book record and returns the updated book"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        for key in ["_id"]:
+            if key in update:
+                raise KeyError(f"Invalid Key. KEY {key} cannot be changed")
+        update["date_modified"] = datetime.now(UTC)
+
+        book = await self.db["books"].find_one_and_update(
+            filter, {"$set": update}, return_document=ReturnDocument.AFTER
+        )
+
+        if book is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+            )
+
+        get_identity_map().add("books", book)
+        count_cache.invalidate("books", update)
+
+        return construct_from_document(s_book.Book, book)
+
+    async def book_delete_record(self, filter: Dict) -> s_book.Book:
+        """Deletes a book record and returns the deleted book"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        book = await self.db["books"].find_one_and_delete(filter)
+
+        if book is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Book not found"
+            )
+
+        get_identity_map().remove("books", {"_id": book["_id"]})
+        count_cache.add("books", book, -1)
+
+        return construct_from_document(s_book.Book, book)
+
+    async def book_increment_rating_aggregates(self, book_id: str, increment: Dict):
+        """Applies a change of the ratings of a book to its stored aggregates"""
+        if not increment:
+            return
+
+        filter = {"_id": ObjectId(book_id)}
+        await self.db["books"].update_one(filter, {"$inc": increment})
+        get_identity_map().remove("books", filter)
+
+    async def book_repair_rating_aggregates(self, batch_size: int = 1000) -> int:
+        """
+        Recomputes the rating aggregates of every book from its reviews
+        with a single aggregation pass over the reviews.
+        Returns the number of books updated
+        """
+        books = self.db["books"]
+        reviews = self.db["reviews"]
+        reviewed = set()
+        updates = []
+        updated = 0
+
+        async for result in reviews.aggregate(rating_aggregates_pipeline()):
+            if not ObjectId.is_valid(result["_id"]):
+                continue
+
+            book_id = ObjectId(result["_id"])
+            reviewed.add(book_id)
+            updates.append(
+                UpdateOne({"_id": book_id}, {"$set": rating_aggregates(result)})
+            )
+
+            if len(updates) >= batch_size:
+                await books.bulk_write(updates, ordered=False)
+                updated += len(updates)
+                updates = []
+
+        async for book in books.find({"review_count": {"$gt": 0}}, {"_id": 1}):
+            if book["_id"] not in reviewed:
+                updates.append(
+                    UpdateOne({"_id": book["_id"]}, {"$set": EMPTY_RATING_AGGREGATES})
+                )
+
+        if updates:
+            await books.bulk_write(updates, ordered=False)
+            updated += len(updates)
+
+        return updated
+
+    # reviews
+    async def review_create_record(
+        self,
+        review_data: s_review.ReviewIn,
+        user_id: str,
+        book_id: str,
+    ) -> s_review.Review:
+        """Creates an review record and returns the created review"""
+        reviews_table = self.db["reviews"]
+        date = datetime.now(UTC)
+        review = s_review.Review(
+            user_id=user_id,
+            book_id=book_id,
+            rating=review_data.rating,
+            title=review_data.title,
+            content=review_data.content,
+            date_created=date,
+            date_modified=date,
+        )
+
+        document = review.model_dump(exclude_unset=True)
+        await reviews_table.insert_one(document)
+        get_identity_map().add("reviews", document)
+        count_cache.add("reviews", document, 1)
+        await self.book_increment_rating_aggregates(
+            book_id, rating_increment(review.rating, 1)
+        )
+
+        return construct_from_document(s_review.Review, document)
+
+    async def review_insert_records(self, documents: List[Dict]) -> List[Dict]:
+        """
+        Inserts a batch of validated review documents and adds the
+        inserted reviews to the rating aggregates of their books.
+        A batch written again after an interruption may hold reviews that
+        were inserted but not counted, the aggregates of their books are
+        recomputed from their reviews instead.
+        Returns the write errors of the documents that were not inserted
+        """
+        errors = await insert_unordered(self.db["reviews"], documents)
+        failed = {error["index"] for error in errors}
+        recomputed = {
+            documents[error["index"]]["book_id"]
+            for error in errors
+            if error.get("code") == DUPLICATE_KEY_ERROR
+        }
+
+        increments: Dict[str, Counter] = defaultdict(Counter)
+        for index, review in enumerate(documents):
+            if index not in failed and review["book_id"] not in recomputed:
+                increments[review["book_id"]].update(
+                    rating_increment(review["rating"], 1)
+                )
+
+        updates = [
+            UpdateOne({"_id": ObjectId(book_id)}, {"$inc": dict(increment)})
+            for book_id, increment in increments.items()
+            if ObjectId.is_valid(book_id)
+        ]
+        if recomputed:
+            results = self.db["reviews"].aggregate(
+                rating_aggregates_pipeline(list(recomputed))
+            )
+            updates += [
+                UpdateOne(
+                    {"_id": ObjectId(result["_id"])},
+                    {"$set": rating_aggregates(result)},
+                )
+                async for result in results
+                if ObjectId.is_valid(result["_id"])
+            ]
+        if updates:
+            await self.db["books"].bulk_write(updates, ordered=False)
+
+        return errors
+
+    async def review_get_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> Optional[s_review.Review]:
+        """Gets a review record from the db using the supplied filter"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        identity_map = get_identity_map()
+        review = identity_map.get("reviews", filter)
+
+        if review is None:
+            review = await self.catalog_find_one("reviews", filter, projection)
+            if projection is None:
+                identity_map.add("reviews", review)
+
+        if review:
+            review = construct_from_document(s_review.Review, review)
+
+        return review
+
+    async def review_get_all_records(
+        self,
+        filter: Dict,
+        limit: int = 0,
+        projection: Optional[Dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> List[s_review.Review]:
+        """
+        Gets all review records from the db using the supplied filter,
+        in _id order unless a sort is given
+        """
+        reviews = self.catalog("reviews")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        reviews_list = (
+            reviews.find(filter, projection)
+            .sort(sort or {"_id": ASCENDING})
+            .limit(limit)
+        )
+
+        reviews_list = [
+            construct_from_document(s_review.Review, review)
+            async for review in reviews_list
+        ]
+
+        return reviews_list
+
+    async def review_get_pages(
+        self,
+        parent_field: str,
+        parents: List[str],
+        filter: Dict,
+        limit: int,
+        projection: Optional[Dict] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+    ) -> Dict[str, List[s_review.Review]]:
+        """
+        Gets the first reviews of each of several parents with one
+        aggregation, by parent. Each parent is read like a page of its own.
+        The reviews are in _id order unless a sort is given
+        """
+        if not parents:
+            return {}
+
+        records = self.catalog("reviews").aggregate(
+            pages_pipeline(
+                "reviews",
+                parent_field,
+                parents,
+                filter,
+                limit,
+                sort or [("_id", ASCENDING)],
+                projection,
+            )
+        )
+        pages = group_pages([record async for record in records])
+
+        return {
+            parent: [
+                construct_from_document(s_review.Review, review) for review in page
+            ]
+            for parent, page in pages.items()
+        }
+
+    async def review_export_records(
+        self, filter: Dict, batch_size: int = 1000
+    ) -> AsyncIterator[List[s_review.Review]]:
+        """
+        Reads the review records matching the filter in batches.
+        Only the current batch is held in memory
+        """
+        reviews = self.catalog("reviews")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        cursor = reviews.find(filter).sort({"_id": ASCENDING}).batch_size(batch_size)
+        while batch := await cursor.to_list(length=batch_size):
+            yield [construct_from_document(s_review.Review, review) for review in batch]
+
+    async def review_get_records_page(
+        self, filter: Dict
+    ) -> CountedPage[s_review.Review]:
+        """
+        Gets a page of review records from the db using the supplied filter.
+        The total is served by review_count_records
+        """
+        reviews = self.catalog("reviews")
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        params, raw_params = verify_params(None, "limit-offset")
+        items = await reviews.find(
+            filter, skip=raw_params.offset, limit=raw_params.limit
+        ).to_list(length=raw_params.limit)
+        total, total_exact = await self.review_count_records(filter)
+
+        return create_page(items, total=total, params=params, total_exact=total_exact)
+
+    async def review_count_records(self, filter: Dict) -> Tuple[int, bool]:
+        """
+        Counts the review records matching the supplied filter.
+        Returns the count and whether it is exact, counts of the whole
+        collection are estimated from its metadata and counts of filters
+        are served from the count cache when they are cached
+        """
+        reviews = self.db["reviews"]
+
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        if not filter:
+            return await reviews.estimated_document_count(), False
+
+        count = count_cache.get("reviews", filter)
+        if count is not None:
+            return count, False
+
+        generation = count_cache.generation("reviews")
+        count = await reviews.count_documents(filter)
+        count_cache.set("reviews", filter, count, generation)
+
+        return count, True
+
+    async def review_verify_record(
+        self, filter: Dict, projection: Optional[Dict] = None
+    ) -> s_review.Review:
+        """
+        Gets a review record using the filter
+        and raises an error if a matching record is not found
+        """
+
+        review = await self.review_get_record(filter, projection)
+
+        if review is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+            )
+
+        return review
+
+    async def review_update_record(self, filter: Dict, update: Dict) -> s_review.Review:
+        """
+        Updates a review record and returns the updated review.
+        The review is read as it was before the update to adjust
+        the rating aggregates of the book
+        """
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        for key in ["_id", "user_id", "book_id"]:
+            if key in update:
+                raise KeyError(f"Invalid Key. KEY {key} cannot be changed")
+        if "rating" in update:
+            verify_rating(update["rating"])
+        update["date_modified"] = datetime.now(UTC)
+
+        previous = await self.db["reviews"].find_one_and_update(
+            filter=filter,
+            update={"$set": update},
+            return_document=ReturnDocument.BEFORE,
+        )
+
+        if previous is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+            )
+
+        review = {**previous, **update}
+        get_identity_map().add("reviews", review)
+        count_cache.invalidate("reviews", update)
+
+        if "rating" in update:
+            await self.book_increment_rating_aggregates(
+                previous["book_id"],
+                rating_change_increment(previous["rating"], update["rating"]),
+            )
+
+        return construct_from_document(s_review.Review, review)
+
+    async def review_delete_record(self, filter: Dict) -> s_review.Review:
+        """Deletes a review record and returns the deleted review"""
+        if "_id" in filter and type(filter["_id"]) is str:
+            filter["_id"] = ObjectId(filter["_id"])
+
+        review = await self.db["reviews"].find_one_and_delete(filter)
+
+        if review is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Review not found"
+            )
+
+        get_identity_map().remove("reviews", {"_id": review["_id"]})
+        count_cache.add("reviews", review, -1)
+        await self.book_increment_rating_aggregates(
+            review["book_id"], rating_increment(review["rating"], -1)
+        )
+
+        return construct_from_document(s_review.Review, review)
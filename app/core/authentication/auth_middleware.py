@@ -1,7 +1,9 @@
+from logging import getLogger
 from typing import List
 
 from core.authentication.auth_token import verify_access_token
-from core.authentication.hashing import hash_verify
+from core.authentication.hashing_pool import hashing_pool
+from core.authentication.principal_cache import principal_cache
 from core.storage import storage
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -17,16 +19,40 @@ credentials_exception: HTTPException = HTTPException(
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
 
-def authenticate_user(email: str, password: str) -> User:
-    user = storage.user_verify_record({"email": email})
+async def hash_new_password(password: str) -> str:
+    """
+    Checks the length of a new password and hashes it on the hashing pool,
+    which rejects the request when it is overloaded
+    """
+    if len(password) < 8:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid password length."
+            + " Password length must be at least 8 characters",
+        )
+
+    return await hashing_pool.hash(password)
 
-    if not hash_verify(hashed_password=user.password, plain_password=password):
+
+async def authenticate_user(email: str, password: str) -> User:
+    user = await storage.user_verify_record({"email": email})
+
+    valid, new_hash = await hashing_pool.verify(
+        hashed_password=user.password, plain_password=password
+    )
+    if not valid:
         raise credentials_exception
 
+    if new_hash is not None:
+        try:
+            await storage.user_update_record({"_id": user.id}, {"password": new_hash})
+        except Exception as ex:
+            getLogger(__name__ + ".authenticate_user").error(ex)
+
     return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Gets the current user.
 
@@ -44,18 +70,26 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
             detail="Invalid token type",
         )
 
-    user = storage.user_get_record({"email": tokenData.email})
+    user = principal_cache.get(tokenData.id)
+    if user is not None and user.email == tokenData.email:
+        return user
+
+    version = principal_cache.version(tokenData.id)
+    user = await storage.user_get_record({"email": tokenData.email})
 
     if user is None:
         raise credentials_exception
 
+    if user.id == tokenData.id:
+        principal_cache.set(user, version)
+
     # if "password" in user:
     #     del user["password"]
 
     return user
 
 
-def get_current_active_user(user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(user: User = Depends(get_current_user)) -> User:
     """
     Gets the current user and verifies if
     their account is active
@@ -76,7 +110,7 @@ def get_current_active_user(user: User = Depends(get_current_user)) -> User:
     return user
 
 
-def get_current_admin_user(
+async def get_current_admin_user(
     user: User = Depends(get_current_active_user),
 ) -> User:
     """
@@ -98,7 +132,7 @@ class RoleBasedAccessControl:
     def __init__(self, roles: List[str]) -> None:
         self.allowed_roles = roles
 
-    def __call__(
+    async def __call__(
         self, current_user: User = Depends(get_current_active_user)
     ) -> None:
         if current_user.role not in self.allowed_roles:
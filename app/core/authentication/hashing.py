@@ -1,11 +1,33 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache
+def get_crypt_context(rounds: int) -> CryptContext:
+    """
+    Gets a crypt context hashing with the given bcrypt cost.
+    Hashes made with any other cost are reported as needing an update
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
 
 
-def hash_bcrypt(password: str) -> CryptContext:
-    return pwd_cxt.hash(password)
+def hash_bcrypt(password: str, rounds: int) -> str:
+    return get_crypt_context(rounds).hash(password)
 
 
-def hash_verify(hashed_password: str, plain_password: str) -> CryptContext:
-    return pwd_cxt.verify(plain_password, hashed_password)
+def hash_verify_and_update(
+    hashed_password: str, plain_password: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verifies a password and returns a new hash of it
+    when the stored hash was made with a different cost
+    """
+    return get_crypt_context(rounds).verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,99 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from core.authentication.hashing import hash_bcrypt, hash_verify_and_update
+from core.config import settings
+from fastapi import HTTPException, status
+
+hashing_overloaded_exception: HTTPException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Too many authentication requests. Try again later",
+    headers={"Retry-After": "1"},
+)
+
+
+class HashingPool:
+    """
+    Runs bcrypt hashing on a pool of worker processes so it never
+    blocks the event loop. Requests beyond the workers and the queue
+    limit are rejected instead of piling up behind a login burst
+    """
+
+    def __init__(self, workers: int, queue_limit: int, rounds: int) -> None:
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rounds = rounds
+        self.pending = 0
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+        return self.executor
+
+    def replace_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drops a broken pool so the next run starts a new one"""
+        if self.executor is executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a hashing function on the pool.
+        A worker killed by a signal or the OOM killer breaks the whole
+        pool, it is then replaced and the function run once more
+        """
+        if self.pending >= self.workers + self.queue_limit:
+            raise hashing_overloaded_exception
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self.get_executor()
+            try:
+                return await loop.run_in_executor(executor, function, *args)
+            except BrokenProcessPool:
+                self.replace_executor(executor)
+                return await loop.run_in_executor(self.get_executor(), function, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hashes a password with the configured cost"""
+        return await self.run(hash_bcrypt, password, self.rounds)
+
+    async def verify(
+        self, hashed_password: str, plain_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Verifies a password.
+        Also returns a new hash when the stored one uses a different cost
+        """
+        return await self.run(
+            hash_verify_and_update, hashed_password, plain_password, self.rounds
+        )
+
+    async def warm_up(self) -> None:
+        """Starts the worker processes so the first logins do not wait for them"""
+        await asyncio.gather(
+            *[self.run(hash_bcrypt, "warm-up", 4) for _ in range(self.workers)]
+        )
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.HASHING_WORKERS,
+    queue_limit=settings.HASHING_QUEUE_LIMIT,
+    rounds=settings.BCRYPT_ROUNDS,
+)
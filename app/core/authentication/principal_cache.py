@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Optional, Tuple
+
+from core.config import settings
+from schemas.user import User
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of authenticated users keyed by user id.
+
+    Every user has a version stamp that is bumped whenever the user
+    record is updated or deleted. Entries cached under an older version
+    are ignored so role and status changes take effect immediately
+    in this process, while the time to live bounds how long other
+    processes can keep serving the old record.
+
+    Stamps are taken from a counter so they are never reused, and are
+    dropped once older than the time to live, when every entry cached
+    before the bump has expired
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[float, int, User]] = OrderedDict()
+        # Version stamp and bump time by user, oldest bump first
+        self.versions: OrderedDict[str, Tuple[int, float]] = OrderedDict()
+        self.counter = 0
+        self.lock = Lock()
+
+    def version(self, user_id: str) -> int:
+        """Gets the current version stamp of a user"""
+        version = self.versions.get(user_id)
+
+        return 0 if version is None else version[0]
+
+    def get(self, user_id: str) -> Optional[User]:
+        """Gets a cached user if the entry is fresh and current"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+
+            expires_at, version, user = entry
+            if expires_at < monotonic() or version != self.version(user_id):
+                del self.entries[user_id]
+                return None
+
+            self.entries.move_to_end(user_id)
+            return user
+
+    def set(self, user: User, version: int) -> None:
+        """
+        Caches a user read while the user was at the given version.
+        The version must be taken before reading the user so a concurrent
+        update can never be hidden by the stale read
+        """
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            self.entries[user.id] = (monotonic() + self.ttl, version, user)
+            self.entries.move_to_end(user.id)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """Bumps the version stamp of a user and drops the cached entry"""
+        with self.lock:
+            now = monotonic()
+            self.counter += 1
+            self.versions[user_id] = (self.counter, now)
+            self.versions.move_to_end(user_id)
+            self.entries.pop(user_id, None)
+
+            while self.versions:
+                _, bumped_at = next(iter(self.versions.values()))
+                if bumped_at + self.ttl >= now:
+                    break
+                self.versions.popitem(last=False)
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
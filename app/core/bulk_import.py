@@ -0,0 +1,330 @@
+import csv
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import UTC, datetime
+from itertools import islice
+from time import monotonic
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Protocol, Set, Tuple
+
+from bson.objectid import ObjectId
+from core.mongo_client import DUPLICATE_KEY_ERROR
+from pydantic import BaseModel, Field, ValidationError
+from schemas.author import AuthorIn
+from schemas.book import BookIn
+from schemas.review import ReviewIn
+
+KINDS = ["authors", "books", "reviews"]
+
+# Fields holding lists, separated by semicolons in csv files
+LIST_FIELDS = {"author_ids", "authors", "genres"}
+CSV_LIST_SEPARATOR = ";"
+
+
+class ImportStorage(Protocol):
+    """The storage methods an import writes with, MongoStorage implements them"""
+
+    def author_insert_records(self, documents: List[Dict]) -> List[Dict]: ...
+
+    def author_get_ids_by_name(self, names: List[str]) -> Dict[str, str]: ...
+
+    def book_insert_records(self, documents: List[Dict]) -> List[Dict]: ...
+
+    def book_get_existing_ids(self, ids: List[str]) -> Set[str]: ...
+
+    def review_insert_records(self, documents: List[Dict]) -> List[Dict]: ...
+
+
+class ImportProgress(BaseModel):
+    """Progress of an import, saved as its checkpoint"""
+
+    source: str
+    kind: str
+    # Prefix of the ids of the imported records
+    import_id: str = Field(default_factory=lambda: str(ObjectId()))
+    position: int = 0
+    inserted: int = 0
+    invalid: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Records processed per second"""
+        return self.position / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Reads the records of a csv file, or of a newline delimited json file"""
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(file):
+                yield {
+                    key: (
+                        value.split(CSV_LIST_SEPARATOR) if key in LIST_FIELDS else value
+                    )
+                    for key, value in row.items()
+                    if value != ""
+                }
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def record_id(import_id: str, number: int) -> ObjectId:
+    """
+    Gets the id of the record at a position of an import.
+    Ids keep the time and the random part of the import id followed
+    by the record number, so a batch written again gets the same ids
+    """
+    return ObjectId(ObjectId(import_id).binary[:7] + number.to_bytes(5, "big"))
+
+
+def to_document(kind: str, record: Dict, date: datetime) -> Dict:
+    """Validates a record and builds the document stored for it"""
+    if kind == "authors":
+        document = AuthorIn(**record).model_dump()
+    elif kind == "books":
+        # Authors can be referenced by name, they are resolved to ids
+        # once the batch is validated
+        author_names = record.pop("authors", [])
+        record.setdefault("author_ids", [])
+        document = BookIn(**record).model_dump()
+        if author_names:
+            document["author_names"] = author_names
+        elif not document["author_ids"]:
+            raise ValueError("A book needs author_ids or authors")
+    else:
+        for key in ["user_id", "book_id"]:
+            if not isinstance(record.get(key), str):
+                raise ValueError(f"A review needs a {key}")
+        document = {
+            "user_id": record["user_id"],
+            "book_id": record["book_id"],
+            **ReviewIn(**record).model_dump(),
+        }
+
+    document["date_created"] = date
+    document["date_modified"] = date
+
+    return document
+
+
+def validate_batch(
+    kind: str, import_id: str, start: int, records: List[Dict]
+) -> Tuple[List[Dict], List[str]]:
+    """
+    Validates a batch of records on a worker process.
+    Returns the documents of the valid records and the errors of the others
+    """
+    date = datetime.now(UTC)
+    documents = []
+    errors = []
+    for number, record in enumerate(records, start=start + 1):
+        try:
+            document = to_document(kind, record, date)
+            document["_id"] = record_id(import_id, number)
+            documents.append(document)
+        except (ValidationError, ValueError, TypeError) as ex:
+            errors.append(f"record {number}: {ex}")
+
+    return documents, errors
+
+
+class BulkImporter:
+    """
+    Imports a file of authors, books or reviews in batches.
+
+    Batches are validated on a pool of worker processes while earlier
+    batches are written, each with a single unordered insert.
+    The position of the last written batch is saved to the checkpoint
+    so an interrupted import resumes after it. A batch interrupted
+    while it was written is written again when the import resumes,
+    its records get the same ids so those already written are skipped
+    and counted once in the rating aggregates. Reviews of books that
+    do not exist are rejected
+    """
+
+    def __init__(
+        self,
+        storage: ImportStorage,
+        kind: str,
+        source: str,
+        batch_size: int = 1000,
+        workers: int = os.cpu_count() or 1,
+        checkpoint: Optional[str] = None,
+        log: Callable[[str], None] = print,
+        report_interval: float = 10.0,
+    ) -> None:
+        self.storage = storage
+        self.kind = kind
+        self.source = source
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.log = log
+        self.report_interval = report_interval
+        self.author_ids: Dict[str, str] = {}
+        self.book_ids: Set[str] = set()
+
+    def load_progress(self) -> ImportProgress:
+        """Loads the progress of an interrupted import of the same file"""
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            with open(self.checkpoint, encoding="utf-8") as file:
+                progress = ImportProgress.model_validate_json(file.read())
+
+            if progress.source == self.source and progress.kind == self.kind:
+                return progress
+
+        return ImportProgress(source=self.source, kind=self.kind)
+
+    def save_progress(self, progress: ImportProgress) -> None:
+        """Saves the checkpoint, replacing the previous one atomically"""
+        if not self.checkpoint:
+            return
+
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(progress.model_dump_json())
+        os.replace(temporary, self.checkpoint)
+
+    def batches(self, position: int) -> Iterator[Tuple[int, List[Dict]]]:
+        """Reads the batches of records after the position"""
+        records = islice(read_records(self.source), position, None)
+        while batch := list(islice(records, self.batch_size)):
+            yield position, batch
+            position += len(batch)
+
+    def resolve_authors(self, documents: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """Replaces the author names of books with the ids of the authors"""
+        names = {
+            name
+            for document in documents
+            for name in document.get("author_names", [])
+            if name not in self.author_ids
+        }
+        if names:
+            self.author_ids.update(self.storage.author_get_ids_by_name(list(names)))
+
+        resolved = []
+        errors = []
+        for document in documents:
+            author_names = document.pop("author_names", [])
+            missing = [name for name in author_names if name not in self.author_ids]
+            if missing:
+                errors.append(f"book {document['title']}: unknown authors {missing}")
+                continue
+
+            document["author_ids"] += [self.author_ids[name] for name in author_names]
+            resolved.append(document)
+
+        return resolved, errors
+
+    def check_books(self, documents: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """Rejects the reviews of books that do not exist"""
+        ids = {
+            document["book_id"]
+            for document in documents
+            if document["book_id"] not in self.book_ids
+        }
+        if ids:
+            self.book_ids.update(self.storage.book_get_existing_ids(list(ids)))
+
+        checked = []
+        errors = []
+        for document in documents:
+            if document["book_id"] not in self.book_ids:
+                errors.append(
+                    f"review of user {document['user_id']}:"
+                    + f" unknown book {document['book_id']}"
+                )
+                continue
+
+            checked.append(document)
+
+        return checked, errors
+
+    def write(self, documents: List[Dict]) -> List[Dict]:
+        """Writes a batch of documents and returns the write errors"""
+        if not documents:
+            return []
+
+        if self.kind == "authors":
+            return self.storage.author_insert_records(documents)
+        if self.kind == "books":
+            return self.storage.book_insert_records(documents)
+        return self.storage.review_insert_records(documents)
+
+    def run(self) -> ImportProgress:
+        progress = self.load_progress()
+        if progress.position:
+            self.log(f"Resuming {self.source} after record {progress.position}")
+
+        start = monotonic() - progress.seconds
+        reported = monotonic()
+        pending: Deque[Tuple[int, Future]] = deque()
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            batches = self.batches(progress.position)
+
+            while True:
+                # Keep every worker busy while the oldest batch is written
+                for position, records in islice(
+                    batches, 2 * self.workers - len(pending)
+                ):
+                    pending.append(
+                        (
+                            position + len(records),
+                            executor.submit(
+                                validate_batch,
+                                self.kind,
+                                progress.import_id,
+                                position,
+                                records,
+                            ),
+                        )
+                    )
+                if not pending:
+                    break
+
+                position, future = pending.popleft()
+                documents, errors = future.result()
+                if self.kind == "books":
+                    documents, unresolved = self.resolve_authors(documents)
+                    errors += unresolved
+                elif self.kind == "reviews":
+                    documents, unknown = self.check_books(documents)
+                    errors += unknown
+
+                # Records of a batch written again that were already written
+                write_errors = [
+                    error
+                    for error in self.write(documents)
+                    if error.get("code") != DUPLICATE_KEY_ERROR
+                ]
+
+                progress.position = position
+                progress.invalid += len(errors)
+                progress.failed += len(write_errors)
+                progress.inserted += len(documents) - len(write_errors)
+                progress.seconds = monotonic() - start
+                self.save_progress(progress)
+
+                for error in errors:
+                    self.log(f"Invalid {error}")
+                for error in write_errors:
+                    self.log(f"Failed to write: {error.get('errmsg')}")
+
+                if monotonic() - reported >= self.report_interval:
+                    reported = monotonic()
+                    self.log(
+                        f"{progress.position} records, {progress.inserted} inserted,"
+                        + f" {progress.rate:,.0f} records/sec"
+                    )
+
+        return progress
@@ -1,52 +1,9 @@
-import logging
-import logging.config
 import os
-from logging.handlers import TimedRotatingFileHandler
-from typing import Any, List
+from typing import Any, List, Optional
 
 from pydantic_settings import BaseSettings
 
 
-def configure_logging():
-    os.makedirs("./logs", exist_ok=True)
-    # Create a TimedRotatingFileHandler
-    handler = TimedRotatingFileHandler(
-        "./logs/book-review-api.log",  # Log file path
-        when="midnight",  # Rotate at midnight
-        interval=1,  # Every 1 day
-        backupCount=31,  # Keep last 7 days of logs
-    )
-
-    # Create a formatter
-    formatter = logging.Formatter(
-        "%(asctime)s - %(levelname)s - %(name)s  - %(message)s"
-    )
-    handler.setFormatter(formatter)
-    handler.setLevel(logging.INFO)
-
-    # Get the root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)  # Set the logging level globally
-    root_logger.addHandler(handler)
-
-    # Optional: Adding console logging
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-
-    # detailed logs
-    detailed_handler = TimedRotatingFileHandler(
-        "./logs/detailed.book-review-api.log",  # Log file path
-        when="midnight",  # Rotate at midnight
-        interval=1,  # Every 1 day
-        backupCount=31,  # Keep last 7 days of logs
-    )
-    detailed_handler.setFormatter(formatter)
-    detailed_handler.setLevel(logging.DEBUG)
-    root_logger.addHandler(detailed_handler)
-
-
 class Settings(BaseSettings):
     VERSION: str = "1.0"
     RELEASE_ID: str = "0.1"
@@ -54,14 +11,75 @@ class Settings(BaseSettings):
     MONGO_URI: str = os.getenv("MONGO_URI")
     DATABSE_SERVICE: str = os.getenv("DATABSE_SERVICE", "MONGO")
     DATABSE_NAME: str = os.getenv("DATABSE_NAME", "book_reviews")
+    MONGO_MAX_POOL_SIZE: int = os.getenv("MONGO_MAX_POOL_SIZE", 100)
+    MONGO_MIN_POOL_SIZE: int = os.getenv("MONGO_MIN_POOL_SIZE", 0)
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+    MONGO_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = os.getenv(
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS"
+    )
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = os.getenv(
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000
+    )
+    MONGO_CONNECT_TIMEOUT_MS: int = os.getenv("MONGO_CONNECT_TIMEOUT_MS", 20000)
+    MONGO_SOCKET_TIMEOUT_MS: Optional[int] = os.getenv("MONGO_SOCKET_TIMEOUT_MS")
+    MONGO_COMPRESSORS: Optional[str] = os.getenv("MONGO_COMPRESSORS")
+    MONGO_READ_PREFERENCE: str = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    MONGO_CATALOG_READ_PREFERENCE: str = os.getenv(
+        "MONGO_CATALOG_READ_PREFERENCE", "primary"
+    )
+    MONGO_CATALOG_MAX_STALENESS_SECONDS: int = os.getenv(
+        "MONGO_CATALOG_MAX_STALENESS_SECONDS", -1
+    )
+    WARM_UP_TIMEOUT_SECONDS: float = os.getenv("WARM_UP_TIMEOUT_SECONDS", 5)
+    SYNC_INDEXES_ON_STARTUP: bool = os.getenv("SYNC_INDEXES_ON_STARTUP", True)
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "*")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_DAYS: int = os.getenv("ACCESS_TOKEN_EXPIRE_DAYS")
+    PRINCIPAL_CACHE_SIZE: int = os.getenv("PRINCIPAL_CACHE_SIZE", 10000)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60)
+    BCRYPT_ROUNDS: int = os.getenv("BCRYPT_ROUNDS", 12)
+    HASHING_WORKERS: int = os.getenv("HASHING_WORKERS", 2)
+    HASHING_QUEUE_LIMIT: int = os.getenv("HASHING_QUEUE_LIMIT", 64)
+    READ_CACHE_SIZE: int = os.getenv("READ_CACHE_SIZE", 10000)
+    READ_CACHE_TTL_SECONDS: float = os.getenv("READ_CACHE_TTL_SECONDS", 2)
+    COUNT_CACHE_SIZE: int = os.getenv("COUNT_CACHE_SIZE", 10000)
+    COUNT_CACHE_TTL_SECONDS: float = os.getenv("COUNT_CACHE_TTL_SECONDS", 60)
+    EXPORT_BATCH_SIZE: int = os.getenv("EXPORT_BATCH_SIZE", 1000)
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
+    LOG_LEVELS: str = os.getenv(
+        "LOG_LEVELS",
+        "pymongo=WARNING,asyncio=WARNING,passlib=WARNING,httpx=WARNING,strawberry=WARNING",
+    )
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+    LOG_DEBUG_SAMPLE_RATE: float = os.getenv("LOG_DEBUG_SAMPLE_RATE", 1.0)
+    LOG_QUEUE_SIZE: int = os.getenv("LOG_QUEUE_SIZE", 10000)
+    DEBUG: bool = os.getenv("DEBUG", False)
+    DB_SLOW_COMMAND_MS: float = os.getenv("DB_SLOW_COMMAND_MS", 100)
+    HEALTH_PING_CACHE_SECONDS: float = os.getenv("HEALTH_PING_CACHE_SECONDS", 1)
+    HEALTH_PING_TIMEOUT_SECONDS: float = os.getenv("HEALTH_PING_TIMEOUT_SECONDS", 2)
+    HEALTH_POOL_SATURATION_WARN: float = os.getenv("HEALTH_POOL_SATURATION_WARN", 0.8)
+    HEALTH_LOOP_LAG_WARN_MS: float = os.getenv("HEALTH_LOOP_LAG_WARN_MS", 100)
+    HEALTH_THREAD_QUEUE_WARN: int = os.getenv("HEALTH_THREAD_QUEUE_WARN", 10)
+    HEALTH_DEGRADED_STATUS_CODE: int = os.getenv("HEALTH_DEGRADED_STATUS_CODE", 200)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", True)
+    GRAPHQL_MAX_COST: int = os.getenv("GRAPHQL_MAX_COST", 1000)
+    GRAPHQL_MAX_DEPTH: int = os.getenv("GRAPHQL_MAX_DEPTH", 10)
+    GRAPHQL_DEFAULT_LIST_SIZE: int = os.getenv("GRAPHQL_DEFAULT_LIST_SIZE", 10)
+    GRAPHQL_MAX_PAGE_SIZE: int = os.getenv("GRAPHQL_MAX_PAGE_SIZE", 100)
+    GRAPHQL_MAX_STORAGE_CALLS: int = os.getenv("GRAPHQL_MAX_STORAGE_CALLS", 100)
+    GRAPHQL_PERSISTED_QUERIES_CACHE_SIZE: int = os.getenv(
+        "GRAPHQL_PERSISTED_QUERIES_CACHE_SIZE", 1000
+    )
+    GRAPHQL_PERSISTED_QUERIES_PATH: Optional[str] = os.getenv(
+        "GRAPHQL_PERSISTED_QUERIES_PATH"
+    )
+    GRAPHQL_PERSISTED_QUERIES_ONLY: bool = os.getenv(
+        "GRAPHQL_PERSISTED_QUERIES_ONLY", False
+    )
 
     def __init__(self, **values: Any):
         super().__init__(**values)
 
 
 settings = Settings()
-configure_logging()
@@ -0,0 +1,174 @@
+from collections import OrderedDict, defaultdict
+from threading import Lock
+from time import monotonic
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from core.config import settings
+from core.read_cache import filter_fields, freeze
+
+
+def matches(filter: Dict, document: Dict) -> Optional[bool]:
+    """
+    Gets whether a document matches an equality filter,
+    or None when the filter uses operators
+    """
+    for key, value in filter.items():
+        if key.startswith("$") or isinstance(value, dict):
+            return None
+
+        field = document.get(key)
+        if field != value and not (isinstance(field, list) and value in field):
+            return False
+
+    return True
+
+
+def is_equality(filter: Dict) -> bool:
+    """Gets whether a filter only matches fields on equal values"""
+    return not any(
+        key.startswith("$") or isinstance(value, dict) for key, value in filter.items()
+    )
+
+
+class CountCache:
+    """
+    Bounded LRU cache with a time to live of the number of documents
+    matching a filter.
+
+    Creating or deleting a document increments or decrements the counts
+    of the equality filters it matches, counts of other filters of the
+    collection are dropped. Updates drop the counts of the filters
+    matching on an updated field.
+
+    Equality filters are indexed by the value of one of their fields so
+    a write only checks the filters the document may match, and every
+    filter is indexed by the fields it matches on for updates.
+
+    Every collection has a generation that is bumped on each write.
+    Counts that started before a write are not cached so a concurrent
+    write can never be hidden by the stale count
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[Tuple[str, Hashable], List] = OrderedDict()
+        # Equality filters by one of their field values, or by collection
+        # when they have no field
+        self.keys_by_value: Dict[Tuple, Set[Tuple[str, Hashable]]] = defaultdict(set)
+        self.operator_keys: Dict[str, Set[Tuple[str, Hashable]]] = defaultdict(set)
+        self.keys_by_field: Dict[Tuple[str, str], Set[Tuple[str, Hashable]]] = (
+            defaultdict(set)
+        )
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.lock = Lock()
+
+    def generation(self, collection: str) -> int:
+        """Gets the current write generation of a collection"""
+        return self.generations[collection]
+
+    def get(self, collection: str, filter: Dict) -> Optional[int]:
+        """Gets the cached count of a filter if it is fresh"""
+        key = (collection, freeze(filter))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, count = entry
+            if expires_at < monotonic():
+                self._remove(key)
+                return None
+
+            self.entries.move_to_end(key)
+            return count
+
+    def set(self, collection: str, filter: Dict, count: int, generation: int) -> None:
+        """
+        Caches a count taken while the collection was at the given generation.
+        The generation must be taken before counting
+        """
+        if self.max_size <= 0:
+            return
+
+        key = (collection, freeze(filter))
+        with self.lock:
+            if generation != self.generations[collection]:
+                return
+
+            if key in self.entries:
+                self._remove(key)
+
+            self.entries[key] = [monotonic() + self.ttl, dict(filter), count]
+            for index, index_key in self._indexes(collection, filter):
+                index[index_key].add(key)
+
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def add(self, collection: str, document: Dict, step: int) -> None:
+        """Adjusts the counts for a document that was created (1) or deleted (-1)"""
+        with self.lock:
+            self.generations[collection] += 1
+
+            for key in list(self.operator_keys.get(collection, ())):
+                self._remove(key)
+
+            keys = set(self.keys_by_value.get((collection,), ()))
+            for field, value in document.items():
+                values = [value] + (value if isinstance(value, list) else [])
+                for item in values:
+                    keys.update(
+                        self.keys_by_value.get((collection, field, freeze(item)), ())
+                    )
+
+            for key in keys:
+                entry = self.entries[key]
+                if matches(entry[1], document):
+                    entry[2] += step
+
+    def invalidate(self, collection: str, fields: Iterable[str]) -> None:
+        """Drops the counts of the filters matching on updated fields"""
+        with self.lock:
+            self.generations[collection] += 1
+
+            keys = set()
+            for field in set(fields):
+                keys.update(self.keys_by_field.get((collection, field), ()))
+
+            for key in keys:
+                self._remove(key)
+
+    def _indexes(self, collection: str, filter: Dict) -> List[Tuple[Dict, Hashable]]:
+        """Gets the indexes holding the key of a filter and its key in each"""
+        indexes = [
+            (self.keys_by_field, (collection, field)) for field in filter_fields(filter)
+        ]
+        if not is_equality(filter):
+            indexes.append((self.operator_keys, collection))
+        elif filter:
+            field = min(filter)
+            indexes.append(
+                (self.keys_by_value, (collection, field, freeze(filter[field])))
+            )
+        else:
+            indexes.append((self.keys_by_value, (collection,)))
+
+        return indexes
+
+    def _remove(self, key: Tuple[str, Hashable]) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        for index, index_key in self._indexes(key[0], entry[1]):
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[index_key]
+
+
+count_cache = CountCache(
+    max_size=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
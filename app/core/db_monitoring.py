@@ -0,0 +1,179 @@
+import json
+from contextvars import ContextVar
+from logging import getLogger
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import settings
+from core.metrics import db_command_duration
+from pymongo import monitoring
+from schemas.metrics import PoolStats
+
+# Command fields whose shape is logged for slow commands
+SHAPED_FIELDS = ["filter", "query", "q", "sort", "pipeline", "updates", "deletes"]
+
+
+def query_shape(value: Any) -> Any:
+    """Replaces the values of a filter with ? keeping its fields and operators"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+        return [query_shape(item) for item in value]
+
+    return "?"
+
+
+class DBUsage:
+    """Database commands sent while handling a request or an operation"""
+
+    def __init__(self, parent: Optional["DBUsage"] = None) -> None:
+        self.parent = parent
+        self.commands = 0
+        self.seconds = 0.0
+        self.lock = Lock()
+
+    def record(self, seconds: float) -> None:
+        # Commands of an operation run on the driver threads concurrently
+        with self.lock:
+            self.commands += 1
+            self.seconds += seconds
+
+        if self.parent is not None:
+            self.parent.record(seconds)
+
+
+db_usage: ContextVar[Optional[DBUsage]] = ContextVar("db_usage", default=None)
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    Attributes the commands sent to mongo db to the request or operation
+    they are sent for and logs the commands slower than the threshold.
+
+    The drivers run the commands on threads that copy the context of the
+    caller, so the usage of the caller is read when a command starts
+    """
+
+    def __init__(self, slow_command_ms: float) -> None:
+        self.slow_command_ms = slow_command_ms
+        # Usage and command of the commands in flight by request and connection
+        self.commands: Dict[Tuple[int, Any], Tuple[Optional[DBUsage], Dict]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.commands[(event.request_id, event.connection_id)] = (
+            db_usage.get(),
+            event.command,
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.finished(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.finished(event)
+
+    def finished(self, event: monitoring.CommandSucceededEvent) -> None:
+        usage, command = self.commands.pop(
+            (event.request_id, event.connection_id), (None, {})
+        )
+        seconds = event.duration_micros / 1e6
+
+        if usage is not None:
+            usage.record(seconds)
+        if settings.METRICS_ENABLED:
+            db_command_duration.observe(seconds, event.command_name)
+
+        if seconds * 1000 >= self.slow_command_ms:
+            shape = {
+                field: query_shape(command[field])
+                for field in SHAPED_FIELDS
+                if field in command
+            }
+            getLogger(__name__ + ".slow_command").warning(
+                f"Slow {event.command_name} on {command.get(event.command_name)}"
+                + f" took {seconds * 1000:.1f}ms: {json.dumps(shape, default=str)}"
+            )
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Counts the connections of the pools of every server and how often
+    and how long requests wait to check a connection out
+    """
+
+    def __init__(self, max_pool_size: int) -> None:
+        self.max_pool_size = max_pool_size
+        self.lock = Lock()
+        self.connections = 0
+        self.checked_out = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.checkout_seconds = 0.0
+        self.pools_cleared = 0
+
+    def add(self, **counts: float) -> None:
+        with self.lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self.add(connections=1)
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self.add(connections=-1)
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        self.add(waiting=1)
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        self.add(
+            waiting=-1,
+            checked_out=1,
+            checkouts=1,
+            checkout_seconds=event.duration or 0.0,
+        )
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        self.add(waiting=-1, checkout_failures=1)
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self.add(checked_out=-1)
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        self.add(pools_cleared=1)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def stats(self) -> PoolStats:
+        """Gets the pool counters"""
+        with self.lock:
+            return PoolStats(
+                max_pool_size=self.max_pool_size,
+                connections=self.connections,
+                checked_out=self.checked_out,
+                waiting=self.waiting,
+                checkouts=self.checkouts,
+                checkout_failures=self.checkout_failures,
+                checkout_seconds=self.checkout_seconds,
+                pools_cleared=self.pools_cleared,
+            )
+
+
+command_monitor = CommandMonitor(slow_command_ms=settings.DB_SLOW_COMMAND_MS)
+pool_monitor = PoolMonitor(max_pool_size=settings.MONGO_MAX_POOL_SIZE)
@@ -0,0 +1,19 @@
+from logging import getLogger
+from typing import AsyncIterable, AsyncIterator, List
+
+from pydantic import BaseModel
+
+
+async def to_ndjson(batches: AsyncIterable[List[BaseModel]]) -> AsyncIterator[str]:
+    """
+    Encodes batches of records as newline delimited json,
+    one chunk per batch, so records are written as they are read
+    """
+    logger = getLogger(__name__ + ".to_ndjson")
+    try:
+        async for batch in batches:
+            yield "".join(record.model_dump_json() + "\n" for record in batch)
+    except Exception as ex:
+        # The response has started so the error can only end the stream
+        logger.error(ex)
+        raise ex
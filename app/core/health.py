@@ -0,0 +1,151 @@
+import asyncio
+from time import monotonic, perf_counter
+from typing import Dict, Iterable, List, Optional
+
+import anyio.to_thread
+from core.config import settings
+from core.db_monitoring import pool_monitor
+from core.storage import storage
+from motor.frameworks import asyncio as motor_asyncio
+from schemas.health import Check, Status
+
+# Seconds between two measures of the event loop lag
+LOOP_LAG_INTERVAL = 0.5
+
+STATUS_SEVERITY = {Status.PASS: 0, Status.WARN: 1, Status.FAIL: 2}
+
+
+def worst_status(statuses: Iterable[Status]) -> Status:
+    """Gets the most severe of the statuses"""
+    return max(statuses, key=STATUS_SEVERITY.__getitem__, default=Status.PASS)
+
+
+def thread_pool_queue() -> int:
+    """Gets the number of blocking calls waiting for a thread"""
+    # Blocking storage calls wait on the limiter of the starlette thread pool
+    waiting = anyio.to_thread.current_default_thread_limiter().statistics()
+    # Motor runs its driver calls on an executor of its own
+    executor = getattr(motor_asyncio, "_EXECUTOR", None)
+    queue = getattr(executor, "_work_queue", None)
+
+    return waiting.tasks_waiting + (queue.qsize() if queue is not None else 0)
+
+
+class HealthChecks:
+    """
+    Checks whether the process can serve requests with a normal latency.
+
+    The database ping is cached so frequent probes from several
+    balancers send a single command. The event loop lag is measured by
+    a background task started by the lifespan
+    """
+
+    def __init__(self, ping_cache_seconds: float, ping_timeout_seconds: float) -> None:
+        self.ping_cache_seconds = ping_cache_seconds
+        self.ping_timeout_seconds = ping_timeout_seconds
+        self.ping_check: Optional[Check] = None
+        self.pinged_at = float("-inf")
+        self.ping_lock = asyncio.Lock()
+        self.loop_lag = 0.0
+
+    async def watch_loop_lag(self) -> None:
+        """Measures how late the event loop wakes up a sleeping task"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag = max(0.0, loop.time() - start - LOOP_LAG_INTERVAL)
+
+    async def ping(self) -> Check:
+        """Pings the database, reusing the result of a recent ping"""
+        async with self.ping_lock:
+            if monotonic() - self.pinged_at < self.ping_cache_seconds:
+                return self.ping_check
+
+            start = perf_counter()
+            try:
+                await asyncio.wait_for(storage.ping(), self.ping_timeout_seconds)
+                elapsed = (perf_counter() - start) * 1000
+                check = Check(
+                    component_type="datastore",
+                    observed_value=elapsed,
+                    observed_unit="ms",
+                    status=(
+                        Status.WARN
+                        if elapsed >= settings.DB_SLOW_COMMAND_MS
+                        else Status.PASS
+                    ),
+                )
+            except Exception as ex:
+                check = Check(
+                    component_type="datastore",
+                    observed_value=(perf_counter() - start) * 1000,
+                    observed_unit="ms",
+                    status=Status.FAIL,
+                    output=repr(ex),
+                )
+
+            self.ping_check = check
+            self.pinged_at = monotonic()
+
+        return check
+
+    def pool_check(self) -> Check:
+        """Checks the share of the connection pool that is checked out"""
+        stats = pool_monitor.stats()
+        saturation = (
+            stats.checked_out / stats.max_pool_size if stats.max_pool_size else 0
+        )
+
+        return Check(
+            component_type="datastore",
+            observed_value=saturation * 100,
+            observed_unit="percent",
+            status=(
+                Status.WARN
+                if saturation >= settings.HEALTH_POOL_SATURATION_WARN
+                else Status.PASS
+            ),
+            output=f"{stats.waiting} waiting for a connection",
+        )
+
+    def loop_lag_check(self) -> Check:
+        lag = self.loop_lag * 1000
+
+        return Check(
+            component_type="system",
+            observed_value=lag,
+            observed_unit="ms",
+            status=(
+                Status.WARN if lag >= settings.HEALTH_LOOP_LAG_WARN_MS else Status.PASS
+            ),
+        )
+
+    def thread_pool_check(self) -> Check:
+        queued = thread_pool_queue()
+
+        return Check(
+            component_type="system",
+            observed_value=queued,
+            observed_unit="tasks",
+            status=(
+                Status.WARN
+                if queued >= settings.HEALTH_THREAD_QUEUE_WARN
+                else Status.PASS
+            ),
+        )
+
+    async def readiness(self) -> Dict[str, List[Check]]:
+        """Runs the checks, named after the health check response format"""
+        return {
+            "mongo:responseTime": [await self.ping()],
+            "mongo:utilization": [self.pool_check()],
+            "eventLoop:lag": [self.loop_lag_check()],
+            "threadPool:queue": [self.thread_pool_check()],
+        }
+
+
+health_checks = HealthChecks(
+    ping_cache_seconds=settings.HEALTH_PING_CACHE_SECONDS,
+    ping_timeout_seconds=settings.HEALTH_PING_TIMEOUT_SECONDS,
+)
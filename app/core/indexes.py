@@ -0,0 +1,114 @@
+from logging import getLogger
+from typing import Dict, List
+
+from pydantic import BaseModel
+from pymongo import ASCENDING, IndexModel
+
+# Indexes every collection is expected to have.
+# Compound indexes end with _id so the filter, the _id cursor
+# and the _id sort used by the list queries are all served by the index.
+# The sorts of the nested GraphQL connections have an index each
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+    ],
+    "authors": [
+        IndexModel([("name", ASCENDING), ("_id", ASCENDING)], name="name_1__id_1"),
+    ],
+    "books": [
+        IndexModel(
+            [("author_ids", ASCENDING), ("_id", ASCENDING)],
+            name="author_ids_1__id_1",
+        ),
+        IndexModel([("title", ASCENDING), ("_id", ASCENDING)], name="title_1__id_1"),
+        IndexModel(
+            [("author_ids", ASCENDING), ("title", ASCENDING), ("_id", ASCENDING)],
+            name="author_ids_1_title_1__id_1",
+        ),
+    ],
+    "reviews": [
+        IndexModel(
+            [("book_id", ASCENDING), ("_id", ASCENDING)], name="book_id_1__id_1"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_1__id_1"
+        ),
+        IndexModel(
+            [("book_id", ASCENDING), ("rating", ASCENDING), ("_id", ASCENDING)],
+            name="book_id_1_rating_1__id_1",
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("rating", ASCENDING), ("_id", ASCENDING)],
+            name="user_id_1_rating_1__id_1",
+        ),
+    ],
+}
+
+
+class IndexReport(BaseModel):
+    collection: str
+    missing: List[str] = []
+    extra: List[str] = []
+    conflicting: List[str] = []
+    created: List[str] = []
+
+    @property
+    def in_sync(self) -> bool:
+        """Whether every registered index exists with the registered spec"""
+        return set(self.missing) <= set(self.created) and not self.conflicting
+
+
+def compare_indexes(collection: str, live: Dict[str, Dict]) -> IndexReport:
+    """
+    Compares the live indexes of a collection, as returned by
+    index_information, with the registered indexes
+    """
+    report = IndexReport(collection=collection)
+    registered = {index.document["name"]: index for index in INDEXES[collection]}
+
+    for name, index in registered.items():
+        if name not in live:
+            report.missing.append(name)
+            continue
+
+        spec = index.document
+        if list(live[name]["key"]) != list(spec["key"].items()) or live[name].get(
+            "unique", False
+        ) != spec.get("unique", False):
+            report.conflicting.append(name)
+
+    report.extra = [name for name in live if name != "_id_" and name not in registered]
+
+    return report
+
+
+def constraint_indexes(collection: str) -> List[IndexModel]:
+    """
+    Gets the registered indexes of a collection that enforce a constraint,
+    such as the unique user emails, rather than speed up queries
+    """
+    return [index for index in INDEXES[collection] if index.document.get("unique")]
+
+
+def missing_indexes(report: IndexReport) -> List[IndexModel]:
+    """Gets the registered index models missing from a collection"""
+    return [
+        index
+        for index in INDEXES[report.collection]
+        if index.document["name"] in report.missing
+    ]
+
+
+def log_index_report(report: IndexReport) -> None:
+    logger = getLogger(__name__ + ".log_index_report")
+
+    if report.created:
+        logger.info(f"{report.collection}: created indexes {report.created}")
+    if not set(report.missing) <= set(report.created):
+        logger.warning(f"{report.collection}: missing indexes {report.missing}")
+    if report.conflicting:
+        logger.warning(
+            f"{report.collection}: indexes differ from registry {report.conflicting}"
+        )
+    if report.extra:
+        logger.warning(f"{report.collection}: unregistered indexes {report.extra}")
@@ -0,0 +1,170 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+from typing import Dict, Optional
+
+from core.config import Settings
+
+
+def parse_levels(levels: str) -> Dict[str, str]:
+    """Parses logger levels given as name=LEVEL pairs separated by commas"""
+    parsed = {}
+    for pair in levels.split(","):
+        name, _, level = pair.strip().partition("=")
+        if name and level:
+            parsed[name.strip()] = level.strip().upper()
+
+    return parsed
+
+
+class DebugSampler(logging.Filter):
+    """Keeps a fraction of the debug records, records of other levels are kept"""
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the logging thread without formatting them.
+    When the queue is full records are dropped and counted
+    so logging never makes a request wait
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the message is merged with its arguments, which may change
+        # before the record is handled. Tracebacks are formatted on the
+        # logging thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as json objects on a single line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class LoggingPipeline:
+    """
+    Sends the log records through a queue to a listener thread that
+    formats and writes them, so logging calls never wait on disk.
+
+    It is started by every process that logs, once it runs, since the
+    listener thread of a parent process does not survive a fork
+    """
+
+    def __init__(self) -> None:
+        self.listener: Optional[QueueListener] = None
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        atexit.register(self.stop)
+
+    def start(self, settings: Settings) -> None:
+        if self.listener is not None:
+            return
+
+        os.makedirs("./logs", exist_ok=True)
+        # Create a TimedRotatingFileHandler
+        handler = TimedRotatingFileHandler(
+            "./logs/book-review-api.log",  # Log file path
+            when="midnight",  # Rotate at midnight
+            interval=1,  # Every 1 day
+            backupCount=31,  # Keep last 7 days of logs
+        )
+
+        # Create a formatter
+        if settings.LOG_FORMAT == "json":
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter(
+                "%(asctime)s - %(levelname)s - %(name)s  - %(message)s"
+            )
+        handler.setFormatter(formatter)
+        handler.setLevel(logging.INFO)
+
+        # Optional: Adding console logging
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(logging.INFO)
+
+        # detailed logs
+        detailed_handler = TimedRotatingFileHandler(
+            "./logs/detailed.book-review-api.log",  # Log file path
+            when="midnight",  # Rotate at midnight
+            interval=1,  # Every 1 day
+            backupCount=31,  # Keep last 7 days of logs
+        )
+        detailed_handler.setFormatter(formatter)
+        detailed_handler.setLevel(logging.DEBUG)
+
+        # The handlers run on the listener thread
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        listener = QueueListener(
+            log_queue,
+            handler,
+            console_handler,
+            detailed_handler,
+            respect_handler_level=True,
+        )
+        listener.start()
+
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        if settings.LOG_DEBUG_SAMPLE_RATE < 1:
+            queue_handler.addFilter(DebugSampler(settings.LOG_DEBUG_SAMPLE_RATE))
+
+        # Get the root logger and set the logging level globally
+        root_logger = logging.getLogger()
+        root_logger.setLevel(settings.LOG_LEVEL.upper())
+        root_logger.addHandler(queue_handler)
+
+        self.listener = listener
+        self.handler = queue_handler
+
+        for name, level in parse_levels(settings.LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+    def stop(self) -> None:
+        """Writes the queued records and stops the listener thread"""
+        if self.listener is None:
+            return
+
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+        self.handler = None
+
+
+logging_pipeline = LoggingPipeline()
@@ -0,0 +1,263 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterable, List, Tuple
+
+from pydantic import BaseModel
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Upper bounds of the buckets of the database commands sent for a request
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Route label of requests that did not match a route,
+# so unknown paths cannot grow the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    """Formats label pairs in the prometheus text format"""
+    if not names:
+        return ""
+
+    pairs = []
+    for name, value in zip(names, values):
+        value = (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        pairs.append(f'{name}="{value}"')
+
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    def __init__(
+        self, name: str, description: str, kind: str, labels: Tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.labels = labels
+        self.lock = Lock()
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    def __init__(
+        self, name: str, description: str, labels: Tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(name, description, "counter", labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self.lock:
+            values = list(self.values.items())
+
+        for labels, value in values:
+            yield f"{self.name}{format_labels(self.labels, labels)} {value}"
+
+
+class Gauge(Counter):
+    def __init__(
+        self, name: str, description: str, labels: Tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(name, description, labels)
+        self.kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Histogram with fixed buckets, each observation updates a single bucket"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, description, "histogram", labels)
+        self.buckets = buckets
+        # Per label values, the count of every bucket followed by the sum
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self.lock:
+            values = [(labels, list(counts)) for labels, counts in self.values.items()]
+
+        names = self.labels + ("le",)
+        for labels, counts in values:
+            # Buckets are cumulative in the text format
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                yield f"{self.name}_bucket{format_labels(names, labels + (bound,))} {total}"
+
+            yield f"{self.name}_sum{format_labels(self.labels, labels)} {counts[-1]}"
+            yield f"{self.name}_count{format_labels(self.labels, labels)} {total}"
+
+
+class MetricsRegistry:
+    """Metrics of the process, rendered in the prometheus text format"""
+
+    def __init__(self) -> None:
+        self.metrics: List[Metric] = []
+
+    def counter(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        return self.register(Gauge(name, description, labels))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def register(self, metric: Metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, *stats: Tuple[str, BaseModel]) -> str:
+        """
+        Renders the metrics, followed by the numeric fields
+        of the given stats models as gauges named after their prefix
+        """
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+
+        for prefix, model in stats:
+            for field, value in model.model_dump().items():
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f"# TYPE {prefix}_{field} gauge")
+                    lines.append(f"{prefix}_{field} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds",
+    "Latency of the http requests by route",
+    ("method", "route", "status"),
+)
+http_request_errors = metrics_registry.counter(
+    "http_request_errors_total",
+    "Http requests that failed by route and error type",
+    ("method", "route", "type"),
+)
+http_requests_in_progress = metrics_registry.gauge(
+    "http_requests_in_progress", "Http requests being handled"
+)
+graphql_resolver_duration = metrics_registry.histogram(
+    "graphql_resolver_duration_seconds",
+    "Latency of the GraphQL fields with a resolver",
+    ("field",),
+)
+graphql_resolver_errors = metrics_registry.counter(
+    "graphql_resolver_errors_total",
+    "GraphQL resolvers that raised by field and error type",
+    ("field", "type"),
+)
+
+db_command_duration = metrics_registry.histogram(
+    "db_command_duration_seconds",
+    "Latency of the commands sent to mongo db by command",
+    ("command",),
+)
+http_request_db_commands = metrics_registry.histogram(
+    "http_request_db_commands",
+    "Mongo db commands sent per http request by route",
+    ("route",),
+    COMMAND_COUNT_BUCKETS,
+)
+http_request_db_duration = metrics_registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in mongo db per http request by route",
+    ("route",),
+)
+
+
+class MetricsMiddleware:
+    """Records the latency, errors and concurrency of the http requests"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        start = perf_counter()
+        error = None
+        try:
+            await self.app(scope, receive, send_status)
+        except Exception as ex:
+            status = 500
+            error = type(ex).__name__
+            raise
+        finally:
+            http_requests_in_progress.dec()
+
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+
+            http_request_duration.observe(
+                perf_counter() - start, method, route, str(status)
+            )
+            if error is None and status >= 500:
+                error = "server_error"
+            elif error is None and status >= 400:
+                error = "client_error"
+            if error is not None:
+                http_request_errors.inc(method, route, error)
+
+            # Set by the request scope for the commands sent for the request
+            usage = scope.get("db_usage")
+            if usage is not None:
+                http_request_db_commands.observe(usage.commands, route)
+                http_request_db_duration.observe(usage.seconds, route)
@@ -0,0 +1,41 @@
+from typing import Any, Dict
+
+from core.config import settings
+from pymongo.read_preferences import (
+    _ServerMode,
+    make_read_preference,
+    read_pref_mode_from_name,
+)
+
+# Code of the write errors of documents whose unique key is already taken
+DUPLICATE_KEY_ERROR = 11000
+
+
+def client_options() -> Dict[str, Any]:
+    """Gets the connection pool, timeout and compression options of the clients"""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS,
+        "compressors": settings.MONGO_COMPRESSORS,
+        "readPreference": settings.MONGO_READ_PREFERENCE,
+    }
+
+    # Unset options keep the driver defaults and the options of the uri
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def catalog_read_preference() -> _ServerMode:
+    """
+    Gets the read preference of the book, author and review reads,
+    which may be served by secondaries lagging at most the max staleness
+    """
+    return make_read_preference(
+        read_pref_mode_from_name(settings.MONGO_CATALOG_READ_PREFERENCE),
+        None,
+        settings.MONGO_CATALOG_MAX_STALENESS_SECONDS,
+    )
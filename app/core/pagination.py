@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ASCENDING
+from schemas.page import CursorPage
+
+DEFAULT_CURSOR_PAGE_SIZE = 50
+MAX_CURSOR_PAGE_SIZE = 100
+
+invalid_cursor_exception: HTTPException = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+)
+
+
+def to_cursor_id(cursor: str) -> ObjectId:
+    """Converts a page cursor to the _id it points after"""
+    if not ObjectId.is_valid(cursor):
+        raise invalid_cursor_exception
+
+    return ObjectId(cursor)
+
+
+def encode_cursor(sort: List[Tuple[str, int]], values: List[Any]) -> str:
+    """
+    Encodes the sort values of a record as an opaque cursor.
+    The sorted fields are part of the cursor so it is only
+    accepted with the sort it was made for
+    """
+    pairs = [
+        [field, str(value) if field == "_id" else value]
+        for (field, _), value in zip(sort, values)
+    ]
+
+    return base64.urlsafe_b64encode(json.dumps(pairs).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: List[Tuple[str, int]]) -> Tuple[Any, ...]:
+    """Decodes the sort values of a cursor made for the sort"""
+    try:
+        pairs = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise invalid_cursor_exception
+
+    if not isinstance(pairs, list) or len(pairs) != len(sort):
+        raise invalid_cursor_exception
+
+    values = []
+    for pair, (field, _) in zip(pairs, sort):
+        if not isinstance(pair, list) or len(pair) != 2 or pair[0] != field:
+            raise invalid_cursor_exception
+
+        value = pair[1]
+        if field == "_id" and isinstance(value, str):
+            values.append(to_cursor_id(value))
+        elif field != "_id" and isinstance(value, (str, int, float)):
+            values.append(value)
+        else:
+            raise invalid_cursor_exception
+
+    return tuple(values)
+
+
+def keyset_filter(sort: List[Tuple[str, int]], values: Tuple[Any, ...]) -> Dict:
+    """
+    Builds the filter matching the records after the sort values of a
+    cursor. With the sort ending with _id it is served by an index on
+    the sorted fields, like the _id range of the cursor pages
+    """
+    conditions = []
+    for index, (field, direction) in enumerate(sort):
+        condition = {
+            previous: value for (previous, _), value in zip(sort[:index], values)
+        }
+        condition[field] = {"$gt" if direction == ASCENDING else "$lt": values[index]}
+        conditions.append(condition)
+
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+def pages_pipeline(
+    collection: str,
+    parent_field: str,
+    parents: List[str],
+    filter: Dict,
+    limit: int,
+    sort: List[Tuple[str, int]],
+    projection: Optional[Dict] = None,
+) -> List[Dict]:
+    """
+    Builds the aggregation reading the first records of several parents
+    in one command. Every parent is a branch of its own, sorted and limited
+    like a single page read and joined with $unionWith, so each branch is
+    served by the index of the sort and only the pages are read.
+    The records are tagged with their parent in _parent. The parent field
+    can be an array, a record is then part of every parent it lists
+    """
+
+    def branch(parent: str) -> List[Dict]:
+        stages = [
+            {"$match": {parent_field: parent, **filter}},
+            {"$sort": dict(sort)},
+            {"$limit": limit},
+        ]
+        if projection is not None:
+            stages.append({"$project": projection})
+        stages.append({"$addFields": {"_parent": parent}})
+
+        return stages
+
+    pipeline = branch(parents[0])
+    for parent in parents[1:]:
+        pipeline.append(
+            {"$unionWith": {"coll": collection, "pipeline": branch(parent)}}
+        )
+
+    return pipeline
+
+
+def group_pages(records: List[Dict]) -> Dict[str, List[Dict]]:
+    """Groups the records read by pages_pipeline by their parent"""
+    pages: Dict[str, List[Dict]] = {}
+    for record in records:
+        pages.setdefault(record.pop("_parent"), []).append(record)
+
+    return pages
+
+
+async def get_cursor_page(
+    get_records: Callable[..., Awaitable[List]],
+    count_records: Callable[[Dict], Awaitable[Tuple[int, bool]]],
+    filter: Dict,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+) -> CursorPage:
+    """
+    Gets the page of records following the cursor in _id order.
+    The page is read with a range on _id served by the indexes ending
+    with _id, so deep pages cost as much as the first one.
+    One extra record is read to tell whether there is a next page
+    and the total is only counted when it is asked for
+    """
+    limit = limit or DEFAULT_CURSOR_PAGE_SIZE
+
+    total = None
+    total_exact = None
+    if include_total:
+        total, total_exact = await count_records(dict(filter))
+
+    if cursor is not None:
+        filter = {**filter, "_id": {"$gt": to_cursor_id(cursor)}}
+
+    records = await get_records(filter, limit=limit + 1)
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = records[-1].id
+
+    return CursorPage(
+        items=records, next_cursor=next_cursor, total=total, total_exact=total_exact
+    )
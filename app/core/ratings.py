@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+RATINGS = range(1, 6)
+
+EMPTY_RATING_AGGREGATES: Dict = {
+    "review_count": 0,
+    "rating_total": 0,
+    "rating_histogram": {str(rating): 0 for rating in RATINGS},
+}
+
+
+def verify_rating(rating: int) -> None:
+    """Raises an error if a rating is outside the 1 to 5 range"""
+    if rating not in RATINGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rating must be between 1 and 5",
+        )
+
+
+def rating_increment(rating: int, step: int) -> Dict:
+    """Gets the $inc document adding (or removing) a rating from a book"""
+    return {
+        "review_count": step,
+        "rating_total": rating * step,
+        f"rating_histogram.{rating}": step,
+    }
+
+
+def rating_change_increment(old_rating: int, new_rating: int) -> Dict:
+    """Gets the $inc document replacing a rating of a book"""
+    if old_rating == new_rating:
+        return {}
+
+    return {
+        "rating_total": new_rating - old_rating,
+        f"rating_histogram.{old_rating}": -1,
+        f"rating_histogram.{new_rating}": 1,
+    }
+
+
+def rating_aggregates_pipeline(book_ids: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Gets the pipeline computing the rating aggregates of every reviewed
+    book, or of the given books
+    """
+    match = [] if book_ids is None else [{"$match": {"book_id": {"$in": book_ids}}}]
+    histogram = {
+        str(rating): {"$sum": {"$cond": [{"$eq": ["$rating", rating]}, 1, 0]}}
+        for rating in RATINGS
+    }
+
+    return match + [
+        {
+            "$group": {
+                "_id": "$book_id",
+                "review_count": {"$sum": 1},
+                "rating_total": {"$sum": "$rating"},
+                **histogram,
+            }
+        }
+    ]
+
+
+def rating_aggregates(result: Dict) -> Dict:
+    """Converts a result of the aggregates pipeline to the book fields"""
+    return {
+        "review_count": result["review_count"],
+        "rating_total": result["rating_total"],
+        "rating_histogram": {str(rating): result[str(rating)] for rating in RATINGS},
+    }
@@ -0,0 +1,210 @@
+from collections import OrderedDict, defaultdict
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from core.config import settings
+from schemas.metrics import ReadCacheStats
+
+
+def freeze(value: Any) -> Hashable:
+    """Converts a filter or an argument to a hashable key"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+
+    return value
+
+
+def filter_fields(filter: Dict) -> Set[str]:
+    """Gets the document fields a filter matches on"""
+    fields = set()
+    for key, value in filter.items():
+        if key.startswith("$") and isinstance(value, list):
+            for condition in value:
+                fields.update(filter_fields(condition))
+        else:
+            fields.add(key)
+
+    return fields
+
+
+class CacheEntry:
+    def __init__(
+        self,
+        expires_at: float,
+        collection: str,
+        ids: Set[str],
+        fields: Optional[Set[str]],
+        value: Any,
+    ) -> None:
+        self.expires_at = expires_at
+        self.collection = collection
+        self.ids = ids
+        # Fields matched by the filter of a query, None for single records
+        self.fields = fields
+        self.value = value
+
+
+class ReadCache:
+    """
+    Bounded LRU cache with a time to live of the catalog reads.
+
+    Entries are indexed by the ids of the documents they hold so a write
+    to a document drops exactly the entries it is part of. Queries are
+    also dropped when a document is created or deleted, since they
+    may now match more or fewer documents, and when a document is
+    updated on a field their filter matches on.
+
+    Every collection has a generation that is bumped on each write.
+    Reads that started before a write are not cached so a concurrent
+    write can never be hidden by the stale read
+    """
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self.keys_by_id: Dict[Tuple[str, str], Set[Hashable]] = defaultdict(set)
+        self.query_keys: Dict[str, Set[Hashable]] = defaultdict(set)
+        self.generations: Dict[str, int] = defaultdict(int)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self, collection: str) -> int:
+        """Gets the current write generation of a collection"""
+        return self.generations[collection]
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Gets whether a fresh entry is cached and its value"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            if entry.expires_at < monotonic():
+                self._remove(key)
+                self.misses += 1
+                return False, None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry.value
+
+    def set(
+        self,
+        key: Hashable,
+        collection: str,
+        generation: int,
+        ids: Iterable[str],
+        value: Any,
+        fields: Optional[Set[str]] = None,
+    ) -> None:
+        """
+        Caches a value read while the collection was at the given generation.
+        The generation must be taken before reading the value
+        """
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            if generation != self.generations[collection]:
+                return
+
+            if key in self.entries:
+                self._remove(key)
+
+            entry = CacheEntry(
+                monotonic() + self.ttl, collection, set(ids), fields, value
+            )
+            self.entries[key] = entry
+            for id in entry.ids:
+                self.keys_by_id[(collection, id)].add(key)
+            if fields is not None:
+                self.query_keys[collection].add(key)
+
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate_document(
+        self, collection: str, id: str, fields: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Drops the entries holding a document that was updated or deleted.
+        When the updated fields are given the queries matching on them
+        are dropped as well, otherwise every query of the collection is
+        """
+        with self.lock:
+            self.generations[collection] += 1
+            self.invalidations += 1
+
+            keys = set(self.keys_by_id.get((collection, id), ()))
+            if fields is None:
+                keys.update(self.query_keys[collection])
+            else:
+                fields = set(fields)
+                keys.update(
+                    key
+                    for key in self.query_keys[collection]
+                    if self.entries[key].fields & fields
+                )
+
+            for key in keys:
+                self._remove(key)
+
+    def invalidate_queries(self, collection: str) -> None:
+        """Drops the queries of a collection a created document may match"""
+        with self.lock:
+            self.generations[collection] += 1
+            self.invalidations += 1
+
+            for key in list(self.query_keys[collection]):
+                self._remove(key)
+
+    def invalidate_collection(self, collection: str) -> None:
+        """Drops every entry of a collection"""
+        with self.lock:
+            self.generations[collection] += 1
+            self.invalidations += 1
+
+            for key in [
+                key
+                for key, entry in self.entries.items()
+                if entry.collection == collection
+            ]:
+                self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        for id in entry.ids:
+            keys = self.keys_by_id.get((entry.collection, id))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_id[(entry.collection, id)]
+        self.query_keys[entry.collection].discard(key)
+
+    def stats(self) -> ReadCacheStats:
+        """Gets the cache counters"""
+        with self.lock:
+            return ReadCacheStats(
+                size=len(self.entries),
+                max_size=self.max_size,
+                hits=self.hits,
+                misses=self.misses,
+                invalidations=self.invalidations,
+            )
+
+
+read_cache = ReadCache(
+    max_size=settings.READ_CACHE_SIZE, ttl=settings.READ_CACHE_TTL_SECONDS
+)
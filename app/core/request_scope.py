@@ -0,0 +1,162 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+from bson.objectid import ObjectId
+from core.config import settings
+from core.db_monitoring import DBUsage, db_usage
+from fastapi import HTTPException, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def to_stored_value(value: Any) -> Any:
+    """Converts a value to the form it is read back from mongo db in"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+    return value
+
+
+class IdentityMap:
+    """
+    Documents read or written while handling a request,
+    keyed by collection and _id.
+    A new map is created for every request so entries never outlive it
+    """
+
+    def __init__(self) -> None:
+        self.collections: Dict[str, Dict[ObjectId, Dict]] = defaultdict(dict)
+
+    def get(self, collection: str, filter: Dict) -> Optional[Dict]:
+        """Gets the document matching an _id equality filter if it is loaded"""
+        id = filter.get("_id")
+        if type(id) is not ObjectId:
+            return None
+
+        document = self.collections[collection].get(id)
+        if document is None:
+            return None
+
+        for key, value in filter.items():
+            if isinstance(value, dict) or document.get(key) != value:
+                return None
+
+        return dict(document)
+
+    def add(self, collection: str, document: Optional[Dict]) -> None:
+        """Adds a document read from or written to the db"""
+        if document is None or "_id" not in document:
+            return
+
+        self.collections[collection][document["_id"]] = {
+            k: to_stored_value(v) for k, v in document.items()
+        }
+
+    def remove(self, collection: str, filter: Dict) -> None:
+        """Removes the documents a write with the filter may have changed"""
+        id = filter.get("_id")
+
+        if type(id) is ObjectId:
+            self.collections[collection].pop(id, None)
+        else:
+            self.collections[collection].clear()
+
+
+identity_map: ContextVar[Optional[IdentityMap]] = ContextVar(
+    "identity_map", default=None
+)
+
+
+def get_identity_map() -> IdentityMap:
+    """
+    Gets the identity map of the current request.
+    Outside a request a throw away map is returned so nothing is cached
+    """
+    return identity_map.get() or IdentityMap()
+
+
+class StorageBudget:
+    """Counts the storage calls of an operation and stops it once over the limit"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.calls = 0
+
+    def spend(self) -> None:
+        self.calls += 1
+        if self.calls > self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Query exceeds the limit of {self.limit} database calls",
+            )
+
+
+class ReadRouting:
+    """Whether the catalog reads of a request must go to the primary"""
+
+    def __init__(self) -> None:
+        self.primary = False
+
+
+read_routing: ContextVar[Optional[ReadRouting]] = ContextVar(
+    "read_routing", default=None
+)
+
+
+def mark_written() -> None:
+    """Sends the following catalog reads of the request to the primary"""
+    routing = read_routing.get()
+    if routing is not None:
+        routing.primary = True
+
+
+def reads_from_primary() -> bool:
+    """Gets whether the current request has written and reads from the primary"""
+    routing = read_routing.get()
+
+    return routing is not None and routing.primary
+
+
+storage_budget: ContextVar[Optional[StorageBudget]] = ContextVar(
+    "storage_budget", default=None
+)
+
+
+class RequestScopeMiddleware:
+    """
+    Opens a new request scope for every http request.
+    In debug mode the database commands sent before the response
+    are reported in the X-DB-Queries and X-DB-Time headers
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # A caller measuring its requests in-process sees their commands too
+        usage = scope["db_usage"] = DBUsage(parent=db_usage.get())
+
+        async def send_usage(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-queries", str(usage.commands).encode()),
+                    (b"x-db-time", f"{usage.seconds * 1000:.1f}ms".encode()),
+                ]
+            await send(message)
+
+        token = identity_map.set(IdentityMap())
+        routing_token = read_routing.set(ReadRouting())
+        usage_token = db_usage.set(usage)
+        try:
+            await self.app(scope, receive, send_usage if settings.DEBUG else send)
+        finally:
+            db_usage.reset(usage_token)
+            read_routing.reset(routing_token)
+            identity_map.reset(token)
@@ -1,9 +1,287 @@
+from inspect import isgeneratorfunction
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from core.async_mongo_storage import AsyncMongoStorage
 from core.config import settings
 from core.mongo_storage import MongoStorage
+from core.ratings import EMPTY_RATING_AGGREGATES
+from core.read_cache import ReadCache, filter_fields, freeze, read_cache
+from core.request_scope import mark_written, storage_budget
+from fastapi_pagination.api import resolve_params
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+CACHED_READS = {
+    f"{prefix}_{operation}": collection
+    for prefix, collection in [
+        ("author", "authors"),
+        ("book", "books"),
+        ("review", "reviews"),
+    ]
+    for operation in [
+        "get_record",
+        "verify_record",
+        "get_all_records",
+        "get_records_page",
+    ]
+}
+
+
+class ThreadedStorage:
+    """
+    Exposes the methods of a blocking storage object as coroutines
+    that run on the thread pool so they do not block the event loop.
+    Generators are exposed as async iterators
+    """
+
+    def __init__(self, storage: MongoStorage) -> None:
+        self.storage = storage
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.storage, name)
+
+        if not callable(attribute):
+            return attribute
+
+        if isgeneratorfunction(attribute):
+            # Every item of the generator is read on the thread pool
+            def generator(*args, **kwargs):
+                return iterate_in_threadpool(attribute(*args, **kwargs))
+
+            return generator
+
+        async def method(*args, **kwargs):
+            return await run_in_threadpool(attribute, *args, **kwargs)
+
+        return method
+
+
+class LazyStorage:
+    """
+    Creates a storage object on first use rather than on import.
+    Every worker process of a pre-fork server opens its own client
+    after the fork, since clients are not safe to share across one
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        self.factory = factory
+        self.storage: Optional[Any] = None
+        self.lock = Lock()
+
+    def connect(self) -> Any:
+        """Creates the storage object if it was not created yet"""
+        if self.storage is None:
+            with self.lock:
+                if self.storage is None:
+                    self.storage = self.factory()
+
+        return self.storage
+
+    def disconnect(self) -> None:
+        """Closes the client of the storage object"""
+        with self.lock:
+            if self.storage is not None:
+                self.storage.client.close()
+                self.storage = None
+
+    def __getattr__(self, name: str):
+        return getattr(self.connect(), name)
+
+
+class BudgetedStorage:
+    """
+    Counts the calls made to a storage object against the
+    storage budget of the current operation, when one is set
+    """
+
+    def __init__(self, storage) -> None:
+        self.storage = storage
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.storage, name)
+
+        if not callable(attribute):
+            return attribute
+
+        def method(*args, **kwargs):
+            budget = storage_budget.get()
+            if budget is not None:
+                budget.spend()
+
+            return attribute(*args, **kwargs)
+
+        return method
+
+
+class CachedStorage:
+    """
+    Serves the book, author and review reads of a storage object
+    from the read cache and invalidates the cached reads on writes.
+    Writes also send the following reads of the request to the primary.
+    Only the cache of this process is invalidated, other worker processes
+    serve their cached reads until they expire after READ_CACHE_TTL_SECONDS
+    """
+
+    def __init__(self, storage, cache: ReadCache) -> None:
+        self.storage = storage
+        self.cache = cache
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.storage, name)
+
+        collection = CACHED_READS.get(name)
+        if collection is None:
+            return attribute
+
+        async def method(*args, **kwargs):
+            filter = kwargs.get("filter", args[0] if args else {})
+            key = self.read_key(name, args, kwargs)
+
+            found, value = self.cache.get(key)
+            if found:
+                return list(value) if isinstance(value, list) else value
+
+            generation = self.cache.generation(collection)
+            value = await attribute(*args, **kwargs)
+
+            if value is not None:
+                # Updates of a sorted field may move documents into the read
+                fields = filter_fields(filter)
+                fields |= {field for field, _ in kwargs.get("sort") or []}
+                self.cache.set(
+                    key,
+                    collection,
+                    generation,
+                    ids=self.read_ids(value),
+                    value=list(value) if isinstance(value, list) else value,
+                    fields=None if fields <= {"_id"} else fields,
+                )
+
+            return value
+
+        return method
+
+    def read_key(self, name: str, args: tuple, kwargs: Dict) -> Hashable:
+        """Gets the cache key of a read from its filter, cursor and limit"""
+        key = (name, freeze(args), freeze(kwargs))
+        if name.endswith("_page"):
+            key += (freeze(resolve_params().model_dump()),)
+
+        return key
+
+    def read_ids(self, value: Any) -> list:
+        """Gets the ids of the documents of a read record, list or page"""
+        if isinstance(value, list):
+            items = value
+        elif hasattr(value, "items") and isinstance(value.items, list):
+            items = value.items
+        else:
+            items = [value]
+
+        return [
+            str(item["_id"]) if isinstance(item, dict) else item.id for item in items
+        ]
+
+    # authors
+    async def author_create_record(self, *args, **kwargs):
+        mark_written()
+        author = await self.storage.author_create_record(*args, **kwargs)
+        self.cache.invalidate_queries("authors")
+
+        return author
+
+    async def author_update_record(self, filter: Dict, update: Dict):
+        mark_written()
+        author = await self.storage.author_update_record(filter, update)
+        self.cache.invalidate_document("authors", author.id, update)
+
+        return author
+
+    async def author_delete_record(self, filter: Dict):
+        mark_written()
+        author = await self.storage.author_delete_record(filter)
+        self.cache.invalidate_document("authors", author.id)
+
+        return author
+
+    # books
+    async def book_create_record(self, *args, **kwargs):
+        mark_written()
+        book = await self.storage.book_create_record(*args, **kwargs)
+        self.cache.invalidate_queries("books")
+
+        return book
+
+    async def book_update_record(self, filter: Dict, update: Dict):
+        mark_written()
+        book = await self.storage.book_update_record(filter, update)
+        self.cache.invalidate_document("books", book.id, update)
+
+        return book
+
+    async def book_delete_record(self, filter: Dict):
+        mark_written()
+        book = await self.storage.book_delete_record(filter)
+        self.cache.invalidate_document("books", book.id)
+
+        return book
+
+    async def book_increment_rating_aggregates(self, book_id: str, increment: Dict):
+        mark_written()
+        await self.storage.book_increment_rating_aggregates(book_id, increment)
+        self.invalidate_rating_aggregates(book_id)
+
+    async def book_repair_rating_aggregates(self, *args, **kwargs) -> int:
+        mark_written()
+        updated = await self.storage.book_repair_rating_aggregates(*args, **kwargs)
+        self.cache.invalidate_collection("books")
+
+        return updated
+
+    def invalidate_rating_aggregates(self, book_id: str) -> None:
+        """Drops the cached reads of a book whose ratings changed"""
+        self.cache.invalidate_document("books", book_id, EMPTY_RATING_AGGREGATES)
+
+    # reviews
+    async def review_create_record(self, *args, **kwargs):
+        mark_written()
+        review = await self.storage.review_create_record(*args, **kwargs)
+        self.cache.invalidate_queries("reviews")
+        self.invalidate_rating_aggregates(review.book_id)
+
+        return review
+
+    async def review_update_record(self, filter: Dict, update: Dict):
+        mark_written()
+        review = await self.storage.review_update_record(filter, update)
+        self.cache.invalidate_document("reviews", review.id, update)
+        if "rating" in update:
+            self.invalidate_rating_aggregates(review.book_id)
+
+        return review
+
+    async def review_delete_record(self, filter: Dict):
+        mark_written()
+        review = await self.storage.review_delete_record(filter)
+        self.cache.invalidate_document("reviews", review.id)
+        self.invalidate_rating_aggregates(review.book_id)
+
+        return review
+
+
+def create_storage():
+    """Creates the storage of the configured database service"""
+    if settings.DATABSE_SERVICE == "MOTOR":
+        return AsyncMongoStorage(settings.DATABSE_NAME)
+    elif settings.DATABSE_SERVICE == "MONGO":
+        return ThreadedStorage(MongoStorage(settings.DATABSE_NAME))
+
+    raise ValueError(
+        f"Unknown DATABSE_SERVICE {settings.DATABSE_SERVICE!r}, use MOTOR or MONGO"
+    )
+
 
-storage = None
+lazy_storage = LazyStorage(create_storage)
 
-if settings.DATABSE_SERVICE == "MONGO":
-    storage = MongoStorage(settings.DATABSE_NAME)
-else:
-    storage = MongoStorage()
+# Cache hits are not counted against the storage budget
+storage = CachedStorage(BudgetedStorage(lazy_storage), read_cache)
@@ -1,13 +1,83 @@
+import json
+from typing import Dict, Optional
+
 import strawberry
+from core.config import settings
+from graphql import GraphQLError
+from graphql_schema.extensions import (
+    OperationDBUsage,
+    QueryCostLimiter,
+    ResolverMetrics,
+)
+from graphql_schema.persisted_queries import (
+    PersistedQueryCache,
+    PersistedQueryError,
+    persisted_queries,
+)
 from graphql_schema.queries import Mutation, Query
 from graphql_schema.types import Context
 from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.async_base_view import AsyncHTTPRequestAdapter
+from strawberry.http.exceptions import HTTPException
+from strawberry.http.parse_content_type import parse_content_type
+from strawberry.types import ExecutionResult
 
 
 async def get_context() -> Context:
     return Context()
 
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQL router that accepts the hash of a persisted query in place of its text"""
+
+    def should_render_graphql_ide(self, request: AsyncHTTPRequestAdapter) -> bool:
+        return super().should_render_graphql_ide(request) and (
+            request.query_params.get("extensions") is None
+        )
+
+    async def get_request_extensions(
+        self, request: AsyncHTTPRequestAdapter
+    ) -> Optional[Dict]:
+        """Gets the extensions sent with a GET or json POST request"""
+        try:
+            if request.method == "GET":
+                extensions = request.query_params.get("extensions")
+                return self.parse_json(extensions) if extensions else None
+
+            content_type, _ = parse_content_type(request.content_type or "")
+            if "application/json" in content_type:
+                data = self.parse_json(await request.get_body())
+                return data.get("extensions") if isinstance(data, dict) else None
+        except json.decoder.JSONDecodeError as e:
+            raise HTTPException(400, "Unable to parse request extensions") from e
+
+        return None
+
+    async def parse_http_body(
+        self, request: AsyncHTTPRequestAdapter
+    ) -> GraphQLRequestData:
+        request_data = await super().parse_http_body(request)
+        request_data.query = persisted_queries.resolve(
+            request_data.query, await self.get_request_extensions(request)
+        )
+
+        return request_data
+
+    async def execute_operation(self, request, context, root_value):
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryError as ex:
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError(ex.message, extensions={"code": ex.code})],
+            )
+
+
+extensions = [PersistedQueryCache, QueryCostLimiter, OperationDBUsage]
+if settings.METRICS_ENABLED:
+    extensions.append(ResolverMetrics)
+
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=extensions)
 
-graphql_app = GraphQLRouter(schema, context_getter=get_context)
+graphql_app = PersistedQueryRouter(schema, context_getter=get_context)
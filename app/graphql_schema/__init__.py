@@ -1,4 +1,6 @@
-from typing import Type, TypeVar
+from dataclasses import fields
+from functools import lru_cache
+from typing import Callable, Type, TypeVar
 
 from pydantic import BaseModel
 
@@ -6,11 +8,39 @@ S = TypeVar(name="S", bound=BaseModel)
 T = TypeVar(name="T")
 
 
-def convert_to_type(input: S, type: Type[T]) -> T:
-    """Converts a pydantic type to a stawberry type"""
+@lru_cache(maxsize=None)
+def get_converter(model: Type[S], type: Type[T]) -> Callable[[S], T]:
+    """
+    Compiles the conversion of a pydantic model to a stawberry type.
+    The fields of the type are matched with the fields of the model once,
+    the converter then builds the values of an instance from the model
+    in one pass and sets them as the instance dict without calling __init__
+    """
+    names = [field.name for field in fields(type) if field.init]
+    stored = [name for name in names if name in model.model_fields]
+    computed = [name for name in names if name in model.model_computed_fields]
+    missing = [name for name in names if name not in stored + computed]
+
+    def convert(input: S) -> T:
+        values = input.__dict__
+        data = {name: values.get(name) for name in stored}
+        for name in computed:
+            data[name] = getattr(input, name)
+        for name in missing:
+            data[name] = None
+
+        instance = object.__new__(type)
+        instance.__dict__ = data
+        return instance
 
-    filtered_data = {
-        k: v for k, v in input.model_dump().items() if k in type.__annotations__
-    }
+    return convert
+
+
+def convert_to_type(input: S, type: Type[T]) -> T:
+    """
+    Converts a pydantic type to a stawberry type.
+    Fields missing from models built from partially loaded documents are
+    set to None, they are not part of the query selection
+    """
 
-    return type(**filtered_data)
+    return get_converter(input.__class__, type)(input)
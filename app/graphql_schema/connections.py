@@ -0,0 +1,103 @@
+from enum import Enum
+from typing import Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+import strawberry
+from core.config import settings
+from core.pagination import encode_cursor
+from fastapi import HTTPException, status
+from graphql_schema import convert_to_type
+from pymongo import ASCENDING, DESCENDING
+
+T = TypeVar("T")
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str] = strawberry.field(
+        description="The cursor of the last edge, to pass as after for the next page."
+    )
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    edges: List[Edge[T]]
+    nodes: List[T]
+    page_info: PageInfo
+
+
+@strawberry.enum(description="The order of a book's or a user's reviews")
+class ReviewSort(Enum):
+    OLDEST = "oldest"
+    NEWEST = "newest"
+    HIGHEST_RATED = "highest_rated"
+    LOWEST_RATED = "lowest_rated"
+
+
+@strawberry.enum(description="The order of an author's books")
+class BookSort(Enum):
+    OLDEST = "oldest"
+    NEWEST = "newest"
+    TITLE = "title"
+
+
+# Mongo sort of every option. Each ends with _id so the order is total,
+# and is served by an index in core/indexes.py read forwards or backwards
+SORTS: Dict[Enum, List[Tuple[str, int]]] = {
+    ReviewSort.OLDEST: [("_id", ASCENDING)],
+    ReviewSort.NEWEST: [("_id", DESCENDING)],
+    ReviewSort.HIGHEST_RATED: [("rating", DESCENDING), ("_id", DESCENDING)],
+    ReviewSort.LOWEST_RATED: [("rating", ASCENDING), ("_id", ASCENDING)],
+    BookSort.OLDEST: [("_id", ASCENDING)],
+    BookSort.NEWEST: [("_id", DESCENDING)],
+    BookSort.TITLE: [("title", ASCENDING), ("_id", ASCENDING)],
+}
+
+
+def check_page_size(size: int, argument: str) -> int:
+    """Checks that a page size argument is at most the maximum page size"""
+    if not 0 < size <= settings.GRAPHQL_MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{argument} must be between 1 and {settings.GRAPHQL_MAX_PAGE_SIZE}",
+        )
+
+    return size
+
+
+def build_connection(
+    records: List, first: int, sort: List[Tuple[str, int]], type: Type[T]
+) -> Connection[T]:
+    """
+    Builds a connection from the records read for a page.
+    One record more than the page size is read to tell whether
+    there is a next page
+    """
+    edges = [
+        Edge(
+            cursor=encode_cursor(
+                sort,
+                [
+                    record.id if field == "_id" else getattr(record, field)
+                    for field, _ in sort
+                ],
+            ),
+            node=convert_to_type(record, type),
+        )
+        for record in records[:first]
+    ]
+
+    return Connection(
+        edges=edges,
+        nodes=[edge.node for edge in edges],
+        page_info=PageInfo(
+            has_next_page=len(records) > first,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
@@ -0,0 +1,295 @@
+from inspect import isawaitable
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from core.config import settings
+from core.db_monitoring import DBUsage, db_usage
+from core.metrics import graphql_resolver_duration, graphql_resolver_errors
+from core.request_scope import StorageBudget, storage_budget
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    GraphQLField,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    GraphQLResolveInfo,
+    GraphQLSchema,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    OperationType,
+    SelectionSetNode,
+    get_named_type,
+    value_from_ast_untyped,
+)
+from strawberry.extensions import SchemaExtension
+from strawberry.types import ExecutionResult
+
+# Arguments bounding the size of the list fields of pages and connections
+LIMIT_ARGUMENTS = ["limit", "first"]
+
+
+class QueryCostEstimator:
+    """
+    Estimates the cost of an operation from its document.
+    Every object field costs one per object it is resolved for.
+    Lists multiply the cost of their fields by the limit or first argument
+    of the field or of its parent page or connection, or the default list size.
+    A limit that is missing or not positive counts as the maximum list size
+    """
+
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        document: DocumentNode,
+        operation_name: Optional[str],
+        variables: Optional[Dict],
+        default_list_size: int,
+        max_list_size: int,
+    ) -> None:
+        self.schema = schema
+        self.default_list_size = default_list_size
+        self.max_list_size = max_list_size
+        self.fragments: Dict[str, FragmentDefinitionNode] = {}
+        self.operation: Optional[OperationDefinitionNode] = None
+
+        for definition in document.definitions:
+            if isinstance(definition, FragmentDefinitionNode):
+                self.fragments[definition.name.value] = definition
+            elif isinstance(definition, OperationDefinitionNode):
+                if operation_name is None or (
+                    definition.name and definition.name.value == operation_name
+                ):
+                    self.operation = definition
+
+        self.variables = {}
+        if self.operation is not None:
+            for definition in self.operation.variable_definitions:
+                if definition.default_value is not None:
+                    self.variables[definition.variable.name.value] = (
+                        value_from_ast_untyped(definition.default_value)
+                    )
+        self.variables.update(variables or {})
+
+    def estimate(self) -> Tuple[int, int]:
+        """Gets the estimated cost and the depth of the operation"""
+        if self.operation is None:
+            return 0, 0
+
+        root_type = {
+            OperationType.QUERY: self.schema.query_type,
+            OperationType.MUTATION: self.schema.mutation_type,
+            OperationType.SUBSCRIPTION: self.schema.subscription_type,
+        }[self.operation.operation]
+
+        return self.selection_cost(
+            root_type, self.operation.selection_set, 1, self.default_list_size, 0
+        )
+
+    def selection_cost(
+        self,
+        parent_type: GraphQLObjectType,
+        selection_set: Optional[SelectionSetNode],
+        multiplier: int,
+        list_size: int,
+        depth: int,
+    ) -> Tuple[int, int]:
+        """Gets the cost and the depth of the object fields of a selection"""
+        cost = 0
+        max_depth = depth
+
+        for node in self.fields(selection_set):
+            if node.name.value.startswith("__"):
+                continue
+
+            field = parent_type.fields.get(node.name.value)
+            if field is None:
+                continue
+
+            field_type = get_named_type(field.type)
+            if not isinstance(field_type, GraphQLObjectType):
+                continue
+
+            limit = self.limit(field, node)
+            size = list_size if limit is None else limit
+
+            output_type = field.type
+            if isinstance(output_type, GraphQLNonNull):
+                output_type = output_type.of_type
+
+            if isinstance(output_type, GraphQLList):
+                field_multiplier = multiplier * size
+                size = self.default_list_size
+            else:
+                field_multiplier = multiplier
+
+            field_cost, field_depth = self.selection_cost(
+                field_type, node.selection_set, field_multiplier, size, depth + 1
+            )
+            cost += field_multiplier + field_cost
+            max_depth = max(max_depth, field_depth)
+
+        return cost, max_depth
+
+    def fields(self, selection_set: Optional[SelectionSetNode]) -> Iterator[FieldNode]:
+        """Gets the fields of a selection, including those in fragments"""
+        if selection_set is None:
+            return
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection
+            elif isinstance(selection, InlineFragmentNode):
+                yield from self.fields(selection.selection_set)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is not None:
+                    yield from self.fields(fragment.selection_set)
+
+    def limit(self, field: GraphQLField, node: FieldNode) -> Optional[int]:
+        """Gets the value of the limit or first argument of a field"""
+        name = next((name for name in LIMIT_ARGUMENTS if name in field.args), None)
+        if name is None:
+            return None
+
+        value = field.args[name].default_value
+        for argument in node.arguments:
+            if argument.name.value == name:
+                value = value_from_ast_untyped(argument.value, self.variables)
+
+        if not isinstance(value, int) or value < 1:
+            return self.max_list_size
+
+        return value
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Rejects operations whose estimated cost or depth is over the
+    configured budget before they are executed, and caps the storage
+    calls an operation can make while it is executed
+    """
+
+    def on_execute(self) -> Iterator[None]:
+        context = self.execution_context
+        cost, depth = QueryCostEstimator(
+            schema=context.schema._schema,
+            document=context.graphql_document,
+            operation_name=context.operation_name,
+            variables=context.variables,
+            default_list_size=settings.GRAPHQL_DEFAULT_LIST_SIZE,
+            max_list_size=settings.GRAPHQL_MAX_PAGE_SIZE,
+        ).estimate()
+
+        message = None
+        if depth > settings.GRAPHQL_MAX_DEPTH:
+            message = (
+                f"Query depth {depth} exceeds the maximum depth"
+                + f" of {settings.GRAPHQL_MAX_DEPTH}"
+            )
+        elif cost > settings.GRAPHQL_MAX_COST:
+            message = (
+                f"Query cost {cost} exceeds the maximum cost"
+                + f" of {settings.GRAPHQL_MAX_COST}"
+            )
+
+        if message is not None:
+            context.result = ExecutionResult(data=None, errors=[GraphQLError(message)])
+            yield
+            return
+
+        token = storage_budget.set(StorageBudget(settings.GRAPHQL_MAX_STORAGE_CALLS))
+        try:
+            yield
+        finally:
+            storage_budget.reset(token)
+
+
+class ResolverMetrics(SchemaExtension):
+    """
+    Records the latency and the errors of the fields with a resolver.
+    Fields read from their parent object are passed through untimed
+    """
+
+    # Metric label of every field, None for the fields that are not timed
+    fields: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def field_label(self, info: GraphQLResolveInfo) -> Optional[str]:
+        key = (info.parent_type.name, info.field_name)
+        if key not in self.fields:
+            field = self.execution_context.schema.get_field_for_type(
+                info.field_name, info.parent_type.name
+            )
+            self.fields[key] = (
+                f"{info.parent_type.name}.{info.field_name}"
+                if field is not None and field.base_resolver is not None
+                else None
+            )
+
+        return self.fields[key]
+
+    def resolve(
+        self, _next: Callable, root: Any, info: GraphQLResolveInfo, *args, **kwargs
+    ) -> Any:
+        label = self.field_label(info)
+        if label is None:
+            return _next(root, info, *args, **kwargs)
+
+        start = perf_counter()
+        try:
+            result = _next(root, info, *args, **kwargs)
+        except Exception as ex:
+            graphql_resolver_errors.inc(label, type(ex).__name__)
+            graphql_resolver_duration.observe(perf_counter() - start, label)
+            raise
+
+        if not isawaitable(result):
+            graphql_resolver_duration.observe(perf_counter() - start, label)
+            return result
+
+        async def timed() -> Any:
+            try:
+                return await result
+            except Exception as ex:
+                graphql_resolver_errors.inc(label, type(ex).__name__)
+                raise
+            finally:
+                graphql_resolver_duration.observe(perf_counter() - start, label)
+
+        return timed()
+
+
+class OperationDBUsage(SchemaExtension):
+    """
+    Counts the database commands sent for every operation.
+    They are logged at debug level and, in debug mode,
+    reported in the extensions of the response
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        self.usage = DBUsage(parent=db_usage.get())
+        token = db_usage.set(self.usage)
+        try:
+            yield
+        finally:
+            db_usage.reset(token)
+            getLogger(__name__ + ".OperationDBUsage").debug(
+                f"Operation {self.execution_context.operation_name or 'anonymous'}"
+                + f" sent {self.usage.commands} database commands"
+                + f" in {self.usage.seconds * 1000:.1f}ms"
+            )
+
+    def get_results(self) -> Dict[str, Any]:
+        if not settings.DEBUG:
+            return {}
+
+        return {
+            "db": {
+                "queries": self.usage.commands,
+                "time_ms": round(self.usage.seconds * 1000, 1),
+            }
+        }
@@ -0,0 +1,178 @@
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from core.pagination import keyset_filter
+from core.storage import storage
+from graphql_schema.connections import SORTS, BookSort, ReviewSort
+from graphql_schema.projection import with_fields
+from schemas import author as s_author
+from schemas import book as s_book
+from schemas import review as s_review
+from schemas import user as s_user
+from strawberry.dataloader import DataLoader
+
+
+def to_object_ids(keys: List[str]) -> List[ObjectId]:
+    """Converts the valid keys of a batch to object ids"""
+
+    return [ObjectId(key) for key in keys if ObjectId.is_valid(key)]
+
+
+async def load_authors(
+    keys: List[str], projection: Optional[Dict] = None
+) -> List[Optional[s_author.Author]]:
+    """Loads a batch of authors by id"""
+    authors = await storage.author_get_all_records(
+        {"_id": {"$in": to_object_ids(keys)}}, projection=projection
+    )
+    authors_by_id = {author.id: author for author in authors}
+
+    return [authors_by_id.get(key) for key in keys]
+
+
+async def load_users(
+    keys: List[str], projection: Optional[Dict] = None
+) -> List[Optional[s_user.User]]:
+    """Loads a batch of users by id"""
+    users = await storage.user_get_all_records(
+        {"_id": {"$in": to_object_ids(keys)}}, projection=projection
+    )
+    users_by_id = {user.id: user for user in users}
+
+    return [users_by_id.get(key) for key in keys]
+
+
+async def load_pages(
+    get_pages: Callable[..., Awaitable[Dict[str, List]]],
+    parent_field: str,
+    keys: List[str],
+    projection: Optional[Dict],
+    first: int,
+    after: Optional[Tuple[Any, ...]],
+    sort: List[Tuple[str, int]],
+) -> List[List]:
+    """
+    Loads a page of the records of every parent of a batch with a single
+    aggregation, reading a limited branch per parent.
+    One record more than the page is read to tell whether there is a next page
+    """
+    pages = await get_pages(
+        parent_field,
+        keys,
+        {} if after is None else keyset_filter(sort, after),
+        limit=first + 1,
+        projection=with_fields(projection, parent_field, *[field for field, _ in sort]),
+        sort=sort,
+    )
+
+    return [pages.get(key, []) for key in keys]
+
+
+async def load_book_reviews(
+    keys: List[str],
+    projection: Optional[Dict] = None,
+    first: int = 10,
+    after: Optional[Tuple[Any, ...]] = None,
+    sort: ReviewSort = ReviewSort.OLDEST,
+) -> List[List[s_review.Review]]:
+    """Loads a page of the reviews of every book of a batch"""
+    return await load_pages(
+        storage.review_get_pages,
+        "book_id",
+        keys,
+        projection,
+        first,
+        after,
+        SORTS[sort],
+    )
+
+
+async def load_user_reviews(
+    keys: List[str],
+    projection: Optional[Dict] = None,
+    first: int = 10,
+    after: Optional[Tuple[Any, ...]] = None,
+    sort: ReviewSort = ReviewSort.OLDEST,
+) -> List[List[s_review.Review]]:
+    """Loads a page of the reviews of every user of a batch"""
+    return await load_pages(
+        storage.review_get_pages,
+        "user_id",
+        keys,
+        projection,
+        first,
+        after,
+        SORTS[sort],
+    )
+
+
+async def load_author_books(
+    keys: List[str],
+    projection: Optional[Dict] = None,
+    first: int = 10,
+    after: Optional[Tuple[Any, ...]] = None,
+    sort: BookSort = BookSort.OLDEST,
+) -> List[List[s_book.Book]]:
+    """Loads a page of the books of every author of a batch"""
+    return await load_pages(
+        storage.book_get_pages,
+        "author_ids",
+        keys,
+        projection,
+        first,
+        after,
+        SORTS[sort],
+    )
+
+
+class Loaders:
+    """
+    Request scoped data loaders.
+    Keys requested while resolving a level of the query are
+    collected and fetched with a single query per collection.
+    A loader is kept per projection and page arguments so each
+    selection loads only its fields and its page
+    """
+
+    def __init__(self) -> None:
+        self.loaders: Dict[Tuple, DataLoader] = {}
+
+    def get(
+        self, load_fn: Callable, projection: Optional[Dict], **arguments: Hashable
+    ) -> DataLoader:
+        """Gets the loader of a load function for a projection and arguments"""
+        key = (
+            load_fn,
+            None if projection is None else tuple(sorted(projection)),
+            tuple(sorted(arguments.items())),
+        )
+        loader = self.loaders.get(key)
+        if loader is None:
+            loader = DataLoader(
+                load_fn=partial(load_fn, projection=projection, **arguments)
+            )
+            self.loaders[key] = loader
+
+        return loader
+
+    def author(self, projection: Optional[Dict] = None) -> DataLoader:
+        return self.get(load_authors, projection)
+
+    def user(self, projection: Optional[Dict] = None) -> DataLoader:
+        return self.get(load_users, projection)
+
+    def book_reviews(
+        self, projection: Optional[Dict] = None, **arguments: Hashable
+    ) -> DataLoader:
+        return self.get(load_book_reviews, projection, **arguments)
+
+    def user_reviews(
+        self, projection: Optional[Dict] = None, **arguments: Hashable
+    ) -> DataLoader:
+        return self.get(load_user_reviews, projection, **arguments)
+
+    def author_books(
+        self, projection: Optional[Dict] = None, **arguments: Hashable
+    ) -> DataLoader:
+        return self.get(load_author_books, projection, **arguments)
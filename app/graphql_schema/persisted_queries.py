@@ -0,0 +1,205 @@
+import json
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+from core.config import settings
+from graphql import DocumentNode
+from schemas.metrics import PersistedQueryStats
+from strawberry.extensions import SchemaExtension
+
+PERSISTED_QUERY_VERSION = 1
+
+
+def get_query_hash(query: str) -> str:
+    """Gets the hash clients send in place of the query text"""
+    return sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueryError(Exception):
+    """A persisted query request that can not be served"""
+
+    def __init__(self, message: str, code: str) -> None:
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class PersistedQueryStore:
+    """
+    Bounded LRU cache of parsed and validated documents keyed by the
+    sha256 hash of their query text, following the automatic persisted
+    queries protocol.
+
+    Clients send only the hash of a query and send the full text once
+    when the server answers that the hash is not found. Queries from the
+    allow-list are always known and when the allow-list is enforced only
+    those queries are executed.
+    """
+
+    def __init__(self, max_size: int, allowed_only: bool = False) -> None:
+        self.max_size = max_size
+        self.allowed_only = allowed_only
+        self.allowed: Dict[str, str] = {}
+        self.entries: OrderedDict[str, Tuple[str, DocumentNode, float]] = OrderedDict()
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.seconds_saved = 0.0
+
+    def load_allow_list(self, path: str) -> None:
+        """Loads the allowed queries from a json file mapping hashes to queries"""
+        with open(path, encoding="utf-8") as file:
+            allowed = json.load(file)
+
+        for query_hash, query in allowed.items():
+            if get_query_hash(query) != query_hash:
+                raise ValueError(f"Allowed query {query_hash} does not match its hash")
+
+        self.allowed = allowed
+
+    def get_query(self, query_hash: str) -> Optional[str]:
+        """Gets the text of an allowed or previously executed query"""
+        query = self.allowed.get(query_hash)
+        if query is not None:
+            return query
+
+        with self.lock:
+            entry = self.entries.get(query_hash)
+            return entry[0] if entry is not None else None
+
+    def resolve(
+        self, query: Optional[str], extensions: Optional[Mapping]
+    ) -> Optional[str]:
+        """Gets the query to execute for the query and extensions of a request"""
+        persisted_query = (extensions or {}).get("persistedQuery")
+
+        if persisted_query is None:
+            if (
+                self.allowed_only
+                and query is not None
+                and get_query_hash(query) not in self.allowed
+            ):
+                raise PersistedQueryError(
+                    "Query is not in the persisted query allow-list",
+                    "PERSISTED_QUERY_NOT_ALLOWED",
+                )
+            return query
+
+        query_hash = persisted_query.get("sha256Hash")
+        if persisted_query.get("version") != PERSISTED_QUERY_VERSION or not isinstance(
+            query_hash, str
+        ):
+            raise PersistedQueryError(
+                "Unsupported persisted query", "PERSISTED_QUERY_NOT_SUPPORTED"
+            )
+
+        if query is None:
+            query = self.get_query(query_hash)
+            if query is None:
+                raise PersistedQueryError(
+                    "PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND"
+                )
+            return query
+
+        if get_query_hash(query) != query_hash:
+            raise PersistedQueryError(
+                "provided sha does not match query", "PERSISTED_QUERY_HASH_MISMATCH"
+            )
+        if self.allowed_only and query_hash not in self.allowed:
+            raise PersistedQueryError(
+                "Query is not in the persisted query allow-list",
+                "PERSISTED_QUERY_NOT_ALLOWED",
+            )
+
+        return query
+
+    def get_document(self, query_hash: str) -> Optional[DocumentNode]:
+        """Gets the cached document of a query and counts the time saved"""
+        with self.lock:
+            entry = self.entries.get(query_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(query_hash)
+            self.hits += 1
+            self.seconds_saved += entry[2]
+            return entry[1]
+
+    def set_document(
+        self, query_hash: str, query: str, document: DocumentNode, seconds: float
+    ) -> None:
+        """Caches a document that parsed and validated in the given time"""
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            self.entries[query_hash] = (query, document, seconds)
+            self.entries.move_to_end(query_hash)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> PersistedQueryStats:
+        """Gets the cache counters"""
+        with self.lock:
+            return PersistedQueryStats(
+                size=len(self.entries),
+                max_size=self.max_size,
+                allowed=len(self.allowed),
+                allowed_only=self.allowed_only,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                parse_validate_seconds_saved=self.seconds_saved,
+            )
+
+
+persisted_queries = PersistedQueryStore(
+    max_size=settings.GRAPHQL_PERSISTED_QUERIES_CACHE_SIZE,
+    allowed_only=settings.GRAPHQL_PERSISTED_QUERIES_ONLY,
+)
+
+
+class PersistedQueryCache(SchemaExtension):
+    """
+    Skips parsing and validating queries whose document is cached and
+    caches the documents of queries that parsed and validated
+    """
+
+    def on_parse(self) -> Iterator[None]:
+        context = self.execution_context
+        self.query_hash = get_query_hash(context.query)
+        document = persisted_queries.get_document(self.query_hash)
+
+        self.cached = document is not None
+        if self.cached:
+            context.graphql_document = document
+            yield
+            return
+
+        start = perf_counter()
+        yield
+        self.seconds = perf_counter() - start
+
+    def on_validate(self) -> Iterator[None]:
+        context = self.execution_context
+        if self.cached:
+            # Cached documents already passed validation
+            context.errors = []
+            yield
+            return
+
+        start = perf_counter()
+        yield
+        self.seconds += perf_counter() - start
+
+        if not context.errors and context.graphql_document is not None:
+            persisted_queries.set_document(
+                self.query_hash, context.query, context.graphql_document, self.seconds
+            )
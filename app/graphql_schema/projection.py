@@ -0,0 +1,97 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import strawberry
+from strawberry.types.nodes import FragmentSpread, InlineFragment, SelectedField
+
+# Document fields needed to resolve the fields of a type that are not
+# stored under their own name. Every other field maps to the document
+# field with the same name
+FIELD_DEPENDENCIES: Dict[str, Dict[str, List[str]]] = {
+    "UserType": {"id": ["_id"], "reviews": ["_id"]},
+    "AuthorType": {"id": ["_id"], "books": ["_id"]},
+    "BookType": {
+        "id": ["_id"],
+        "authors": ["author_ids"],
+        "reviews": ["_id"],
+        "average_rating": ["review_count", "rating_total"],
+    },
+    "ReviewType": {"id": ["_id"], "user": ["user_id"]},
+}
+
+
+def flatten_selections(selections: Iterable) -> Iterator[SelectedField]:
+    """Gets the fields of a selection set, including those in fragments"""
+    for selection in selections:
+        if isinstance(selection, (FragmentSpread, InlineFragment)):
+            yield from flatten_selections(selection.selections)
+        else:
+            yield selection
+
+
+def get_projection(
+    info: strawberry.Info, type: type, *path: str
+) -> Optional[Dict[str, int]]:
+    """
+    Builds the mongo projection loading only the document fields needed
+    for the fields of the type selected at path below the resolved field.
+    Returns None, loading whole documents, if a field can not be mapped
+    """
+    fields = list(
+        flatten_selections(
+            selection
+            for field in info.selected_fields
+            for selection in field.selections
+        )
+    )
+    for name in path:
+        fields = list(
+            flatten_selections(
+                selection
+                for field in fields
+                if field.name == name
+                for selection in field.selections
+            )
+        )
+
+    name_converter = info.schema.config.name_converter
+    python_names = {
+        name_converter.from_field(field): field.python_name
+        for field in type.__strawberry_definition__.fields
+    }
+    dependencies = FIELD_DEPENDENCIES.get(type.__name__, {})
+
+    projection = {"_id": 1}
+    for field in fields:
+        if field.name == "__typename":
+            continue
+
+        python_name = python_names.get(field.name)
+        if python_name is None:
+            return None
+
+        for document_field in dependencies.get(python_name, [python_name]):
+            projection[document_field] = 1
+
+    return projection
+
+
+def get_connection_projection(
+    info: strawberry.Info, type: type
+) -> Optional[Dict[str, int]]:
+    """Builds the projection of the nodes selected under edges and nodes"""
+    edges = get_projection(info, type, "edges", "node")
+    nodes = get_projection(info, type, "nodes")
+    if edges is None or nodes is None:
+        return None
+
+    return {**edges, **nodes}
+
+
+def with_fields(
+    projection: Optional[Dict[str, int]], *fields: str
+) -> Optional[Dict[str, int]]:
+    """Adds the fields a loader groups documents by to a projection"""
+    if projection is None:
+        return None
+
+    return {**projection, **{field: 1 for field in fields}}
@@ -4,10 +4,10 @@ from graphql_schema.types import Context
 from schemas import user as s_user
 
 
-def get_context_user(
+async def get_context_user(
     info: strawberry.Info[Context], role: s_user.Role = s_user.Role.USER
 ) -> s_user.User:
-    current_user = info.context.user
+    current_user = await info.context.get_user()
 
     if not current_user:
         raise HTTPException(
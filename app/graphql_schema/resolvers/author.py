@@ -4,10 +4,12 @@ from logging import getLogger
 from typing import Optional
 
 import strawberry
-from bson.objectid import ObjectId
+from core.pagination import to_cursor_id
 from core.storage import storage
 from fastapi import HTTPException, status
 from graphql_schema import convert_to_type
+from graphql_schema.connections import check_page_size
+from graphql_schema.projection import get_projection
 from graphql_schema.resolvers import get_context_user
 from graphql_schema.types import AuthorType, Context, Page, PageMeta
 from schemas import author as s_author
@@ -29,11 +31,13 @@ class AuthorUpdateInput:
     gender: Optional[str] = strawberry.UNSET
 
 
-def get_author(author_id: str) -> AuthorType:
+async def get_author(author_id: str, info: strawberry.Info[Context]) -> AuthorType:
     """Gets an author by id"""
     logger = getLogger(__name__ + ".get_author")
     try:
-        author = storage.author_verify_record({"_id": author_id})
+        author = await storage.author_verify_record(
+            {"_id": author_id}, projection=get_projection(info, AuthorType)
+        )
 
         return convert_to_type(author, AuthorType)
     except Exception as ex:
@@ -43,7 +47,8 @@ def get_author(author_id: str) -> AuthorType:
         raise ex
 
 
-def get_authors(
+async def get_authors(
+    info: strawberry.Info[Context],
     limit: int = 10,
     name: Optional[str] = None,
     cursor: Optional[str] = None,
@@ -54,13 +59,18 @@ def get_authors(
     """
     logger = getLogger(__name__ + ".get_authors")
     try:
+        limit = check_page_size(limit, "limit")
         filter = {}
         if name is not None:
             filter["name"] = name
 
         if cursor is not None:
-            filter["_id"] = {"$gt": ObjectId(cursor)}
-        authors = storage.author_get_all_records(filter=filter, limit=limit)
+            filter["_id"] = {"$gt": to_cursor_id(cursor)}
+        authors = await storage.author_get_all_records(
+            filter=filter,
+            limit=limit,
+            projection=get_projection(info, AuthorType, "items"),
+        )
 
         next_cursor = None
         if authors:
@@ -78,15 +88,13 @@ def get_authors(
         raise ex
 
 
-def add_author(data: AuthorInput, info: strawberry.Info[Context]) -> AuthorType:
+async def add_author(data: AuthorInput, info: strawberry.Info[Context]) -> AuthorType:
     """Creates an author record"""
     logger = getLogger(__name__ + ".add_author")
     try:
-        get_context_user(info)
+        await get_context_user(info)
         author_input = s_author.AuthorIn(**asdict(data))
-        id = storage.author_create_record(author_data=author_input)
-
-        return storage.author_verify_record({"_id": id})
+        return await storage.author_create_record(author_data=author_input)
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -94,7 +102,7 @@ def add_author(data: AuthorInput, info: strawberry.Info[Context]) -> AuthorType:
         raise ex
 
 
-def update_author(
+async def update_author(
     data: AuthorUpdateInput,
     author_id: str,
 ) -> AuthorType:
@@ -108,9 +116,9 @@ def update_author(
             if v is not strawberry.UNSET:
                 update[k] = v
 
-        storage.author_update_record(filter={"_id": author_id}, update=update)
-
-        return storage.author_verify_record({"_id": author_id})
+        return await storage.author_update_record(
+            filter={"_id": author_id}, update=update
+        )
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -118,12 +126,12 @@ def update_author(
         raise ex
 
 
-def delete_author(author_id: str, info: strawberry.Info[Context]) -> bool:
+async def delete_author(author_id: str, info: strawberry.Info[Context]) -> bool:
     """deletes an author by id"""
     logger = getLogger(__name__ + ".delete_author")
     try:
-        get_context_user(info)
-        storage.author_delete_record({"_id": author_id})
+        await get_context_user(info)
+        await storage.author_delete_record({"_id": author_id})
 
         return True
     except Exception as ex:
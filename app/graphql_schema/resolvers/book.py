@@ -4,10 +4,12 @@ from logging import getLogger
 from typing import List, Optional
 
 import strawberry
-from bson.objectid import ObjectId
+from core.pagination import to_cursor_id
 from core.storage import storage
 from fastapi import HTTPException, status
 from graphql_schema import convert_to_type
+from graphql_schema.connections import check_page_size
+from graphql_schema.projection import get_projection
 from graphql_schema.resolvers import get_context_user
 from graphql_schema.types import BookType, Context, Page, PageMeta
 from schemas.book import Book, BookIn
@@ -41,7 +43,8 @@ class BookUpdateInput:
     release_date: Optional[datetime] = strawberry.UNSET
 
 
-def get_books(
+async def get_books(
+    info: strawberry.Info[Context],
     title: Optional[str] = None,
     limit: int = 10,
     cursor: Optional[str] = None,
@@ -49,14 +52,17 @@ def get_books(
     """Get books"""
     logger = getLogger(__name__ + ".get_books")
     try:
+        limit = check_page_size(limit, "limit")
         filter = {}
         if title is not None:
             filter["title"] = title
 
         if cursor is not None:
-            filter["_id"] = {"$gt": ObjectId(cursor)}
+            filter["_id"] = {"$gt": to_cursor_id(cursor)}
 
-        books = storage.book_get_all_records(filter, limit=limit)
+        books = await storage.book_get_all_records(
+            filter, limit=limit, projection=get_projection(info, BookType, "items")
+        )
 
         next_cursor = None
         if books:
@@ -75,11 +81,13 @@ def get_books(
         raise ex
 
 
-def get_book(book_id: str) -> Book:
+async def get_book(book_id: str, info: strawberry.Info[Context]) -> Book:
     """Gets an book by id"""
     logger = getLogger(__name__ + ".get_book")
     try:
-        book = storage.book_verify_record({"_id": book_id})
+        book = await storage.book_verify_record(
+            {"_id": book_id}, projection=get_projection(info, BookType)
+        )
 
         return convert_to_type(book, BookType)
     except Exception as ex:
@@ -89,15 +97,13 @@ def get_book(book_id: str) -> Book:
         raise ex
 
 
-def add_book(data: BookInput, info: strawberry.Info[Context]) -> BookType:
+async def add_book(data: BookInput, info: strawberry.Info[Context]) -> BookType:
     """Creates an book record"""
     logger = getLogger(__name__ + ".add_book")
     try:
-        get_context_user(info, role="admin")
+        await get_context_user(info, role="admin")
         book_data = BookIn(**asdict(data))
-        id = storage.book_create_record(book_data)
-
-        book = storage.book_verify_record({"_id": id})
+        book = await storage.book_create_record(book_data)
 
         return convert_to_type(book, BookType)
     except Exception as ex:
@@ -107,22 +113,20 @@ def add_book(data: BookInput, info: strawberry.Info[Context]) -> BookType:
         raise ex
 
 
-def update_book(
+async def update_book(
     data: BookUpdateInput, book_id: str, info: strawberry.Info[Context]
 ) -> Book:
     """Gets an book by id"""
     logger = getLogger(__name__ + ".update_book")
     try:
-        get_context_user(info, role="admin")
+        await get_context_user(info, role="admin")
         update = {}
 
         for k, v in asdict(data).items():
             if v is not strawberry.UNSET:
                 update[k] = v
 
-        storage.book_update_record(filter={"_id": book_id}, update=update)
-
-        book = storage.book_verify_record({"_id": book_id})
+        book = await storage.book_update_record(filter={"_id": book_id}, update=update)
 
         return convert_to_type(book, BookType)
     except Exception as ex:
@@ -132,12 +136,12 @@ def update_book(
         raise ex
 
 
-def delete_book(book_id: str, info: strawberry.Info[Context]) -> bool:
+async def delete_book(book_id: str, info: strawberry.Info[Context]) -> bool:
     """deletes an book by id"""
     logger = getLogger(__name__ + ".delete_book")
     try:
-        get_context_user(info, role="admin")
-        storage.book_delete_record({"_id": book_id})
+        await get_context_user(info, role="admin")
+        await storage.book_delete_record({"_id": book_id})
 
         return True
 
@@ -3,10 +3,12 @@ from logging import getLogger
 from typing import Optional
 
 import strawberry
-from bson.objectid import ObjectId
+from core.pagination import to_cursor_id
 from core.storage import storage
 from fastapi import HTTPException, status
 from graphql_schema import convert_to_type
+from graphql_schema.connections import check_page_size
+from graphql_schema.projection import get_projection
 from graphql_schema.resolvers import get_context_user
 from graphql_schema.types import Context, Page, PageMeta, ReviewType
 from schemas import review as p
@@ -26,20 +28,26 @@ class ReviewUpdateInput:
     content: Optional[str] = strawberry.UNSET
 
 
-def get_reviews(
+async def get_reviews(
     book_id: str,
+    info: strawberry.Info[Context],
     limit: int = 10,
     cursor: Optional[str] = None,
 ) -> Page[ReviewType]:
     """Gets the reviews of a book"""
     logger = getLogger(__name__ + ".get_reviews")
     try:
-        storage.book_verify_record({"_id": book_id})
+        limit = check_page_size(limit, "limit")
+        await storage.book_verify_record({"_id": book_id}, projection={"_id": 1})
         filter = {"book_id": book_id}
         if cursor is not None:
-            filter["_id"] = {"$gt": {ObjectId(cursor)}}
+            filter["_id"] = {"$gt": to_cursor_id(cursor)}
 
-        reviews = storage.review_get_all_records(filter=filter, limit=limit)
+        reviews = await storage.review_get_all_records(
+            filter=filter,
+            limit=limit,
+            projection=get_projection(info, ReviewType, "items"),
+        )
 
         next_cursor = None
         if reviews:
@@ -60,12 +68,14 @@ def get_reviews(
         raise ex
 
 
-def get_review(review_id: str) -> ReviewType:
+async def get_review(review_id: str, info: strawberry.Info[Context]) -> ReviewType:
     """Gets a review by its id"""
     logger = getLogger(__name__ + ".get_review")
     try:
 
-        review = storage.review_verify_record({"_id": review_id})
+        review = await storage.review_verify_record(
+            {"_id": review_id}, projection=get_projection(info, ReviewType)
+        )
 
         return convert_to_type(review, ReviewType)
     except Exception as ex:
@@ -77,21 +87,20 @@ def get_review(review_id: str) -> ReviewType:
         raise ex
 
 
-def add_review(
+async def add_review(
     book_id: str, review_data: ReviewInput, info: strawberry.Info[Context]
 ) -> ReviewType:
     """Adds a review to a book"""
     logger = getLogger(__name__ + ".add_review")
     try:
-        current_user = get_context_user(info)
-        storage.book_verify_record({"_id": book_id})
+        current_user = await get_context_user(info)
+        await storage.book_verify_record({"_id": book_id}, projection={"_id": 1})
 
-        id = storage.review_create_record(
+        review = await storage.review_create_record(
             review_data=p.ReviewIn(**asdict(review_data)),
             user_id=current_user.id,
             book_id=book_id,
         )
-        review = storage.review_verify_record({"_id": id})
 
         return convert_to_type(review, ReviewType)
     except Exception as ex:
@@ -103,26 +112,24 @@ def add_review(
         raise ex
 
 
-def update_review(
+async def update_review(
     review_id: str, review_data: ReviewUpdateInput, info: strawberry.Info[Context]
 ) -> ReviewType:
     """Updates a book review"""
     logger = getLogger(__name__ + ".update_review")
     try:
-        current_user = get_context_user(info)
+        current_user = await get_context_user(info)
         update = {}
 
         for k, v in asdict(review_data).items():
             if v is not strawberry.UNSET:
                 update[k] = v
 
-        storage.review_update_record(
+        review = await storage.review_update_record(
             filter={"_id": review_id, "user_id": current_user.id}, update=update
         )
 
-        review = storage.review_verify_record({"_id": review_id})
-
-        return convert_to_type(**asdict(review))
+        return convert_to_type(review, ReviewType)
     except Exception as ex:
         logger.error(ex)
         if type(ex) is not HTTPException:
@@ -132,12 +139,14 @@ def update_review(
         raise ex
 
 
-def delete_review(review_id: str, info: strawberry.Info[Context]) -> bool:
+async def delete_review(review_id: str, info: strawberry.Info[Context]) -> bool:
     """Deletes a review by its id"""
     logger = getLogger(__name__ + ".delete_review")
     try:
-        current_user = get_context_user(info)
-        storage.review_delete_record({"_id": review_id, "user_id": current_user.id})
+        current_user = await get_context_user(info)
+        await storage.review_delete_record(
+            {"_id": review_id, "user_id": current_user.id}
+        )
 
         return True
     except Exception as ex:
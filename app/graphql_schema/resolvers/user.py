@@ -2,7 +2,7 @@ from logging import getLogger
 from typing import TypeVar
 
 import strawberry
-from core.authentication.auth_middleware import authenticate_user
+from core.authentication.auth_middleware import authenticate_user, hash_new_password
 from core.authentication.auth_token import create_access_token
 from core.storage import storage
 from fastapi import HTTPException, status
@@ -29,11 +29,11 @@ class LoginInput:
     password: str = strawberry.field(description="The user's password")
 
 
-def get_user_me(info: strawberry.Info[Context]) -> UserType:
+async def get_user_me(info: strawberry.Info[Context]) -> UserType:
     """Gets a user"""
     logger = getLogger(__name__ + ".get_user_me")
     try:
-        current_user = get_context_user(info)
+        current_user = await get_context_user(info)
 
         return convert_to_type(current_user, UserType)
     except Exception as ex:
@@ -43,15 +43,17 @@ def get_user_me(info: strawberry.Info[Context]) -> UserType:
         raise ex
 
 
-def register_user(user_in: UserInput) -> UserType:
+async def register_user(user_in: UserInput) -> UserType:
     """Registers a user"""
     logger = getLogger(__name__ + ".register_user")
     try:
         data = s_user.UserIn(
             username=user_in.username, email=user_in.email, password=user_in.password
         )
-        id = storage.user_create_record(user_data=data)
-        new_user = storage.user_verify_record({"_id": id})
+        password_hash = await hash_new_password(data.password)
+        new_user = await storage.user_create_record(
+            user_data=data, password_hash=password_hash
+        )
 
         return convert_to_type(new_user, UserType)
     except Exception as ex:
@@ -61,12 +63,14 @@ def register_user(user_in: UserInput) -> UserType:
         raise ex
 
 
-def login_user(auth_input: LoginInput) -> str:
+async def login_user(auth_input: LoginInput) -> str:
     """Authenticates a user and returns a jwt string"""
     logger = getLogger(__name__ + ".login_user")
     try:
 
-        user = authenticate_user(email=auth_input.email, password=auth_input.password)
+        user = await authenticate_user(
+            email=auth_input.email, password=auth_input.password
+        )
 
         logger.info("User Authenticated")
 
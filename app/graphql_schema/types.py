@@ -3,24 +3,52 @@ from functools import cached_property
 from typing import Generic, List, Optional, TypeVar
 
 import strawberry
-from bson.objectid import ObjectId
 from core.authentication.auth_middleware import get_current_user
-from core.storage import storage
+from core.config import settings
+from core.pagination import decode_cursor
+from core.request_scope import IdentityMap, get_identity_map
+from fastapi import HTTPException, status
 from graphql_schema import convert_to_type
+from graphql_schema.connections import (
+    SORTS,
+    BookSort,
+    Connection,
+    ReviewSort,
+    build_connection,
+    check_page_size,
+)
+from graphql_schema.loaders import Loaders
+from graphql_schema.projection import get_connection_projection, get_projection
 from schemas.user import Role, SignInType, User, UserStatus
 from strawberry.fastapi import BaseContext
 
 
 class Context(BaseContext):
+    def __init__(self) -> None:
+        super().__init__()
+        self._user: User | None = None
+        self._user_loaded = False
+
+    async def get_user(self) -> User | None:
+        if self._user_loaded:
+            return self._user
+
+        if self.request:
+            authorization = self.request.headers.get("Authorization", None)
+            if authorization:
+                token = authorization.split(" ")[-1]
+                self._user = await get_current_user(token=token)
+
+        self._user_loaded = True
+        return self._user
+
     @cached_property
-    def user(self) -> User | None:
-        if not self.request:
-            return None
+    def loaders(self) -> Loaders:
+        return Loaders()
 
-        authorization = self.request.headers.get("Authorization", None)
-        if authorization:
-            token = authorization.split(" ")[-1]
-            return get_current_user(token=token)
+    @property
+    def identity_map(self) -> IdentityMap:
+        return get_identity_map()
 
 
 @strawberry.type
@@ -54,13 +82,23 @@ class UserType:
 
     # Resolved
     @strawberry.field
-    def reviews(self) -> List["ReviewType"]:
-        """Gets a user's reviews"""
-
-        reviews = storage.review_get_all_records({"user_id": self.id})
-        reviews = [convert_to_type(review, ReviewType) for review in reviews]
-
-        return reviews
+    async def reviews(
+        self,
+        info: strawberry.Info[Context],
+        first: int = settings.GRAPHQL_DEFAULT_LIST_SIZE,
+        after: Optional[str] = None,
+        sort: ReviewSort = ReviewSort.OLDEST,
+    ) -> Connection["ReviewType"]:
+        """Gets a page of a user's reviews"""
+        first = check_page_size(first, "first")
+        reviews = await info.context.loaders.user_reviews(
+            get_connection_projection(info, ReviewType),
+            first=first,
+            after=None if after is None else decode_cursor(after, SORTS[sort]),
+            sort=sort,
+        ).load(self.id)
+
+        return build_connection(reviews, first, SORTS[sort], ReviewType)
 
 
 @strawberry.type
@@ -76,26 +114,42 @@ class BookType:
     pages: Optional[int]
     blurb: Optional[str]
     release_date: Optional[datetime]
+    average_rating: Optional[float]
+    review_count: int
+    rating_histogram: List[int] = strawberry.field(
+        description="The number of reviews with each rating from 1 to 5"
+    )
 
     # Resolved
     @strawberry.field
-    def authors(self) -> List["AuthorType"]:
+    async def authors(self, info: strawberry.Info[Context]) -> List["AuthorType"]:
         """The book's authors"""
-        ids = [ObjectId(id) for id in self.author_ids]
 
-        authors = storage.author_get_all_records({"_id": {"$in": ids}})
-        authors = [convert_to_type(author, AuthorType) for author in authors]
+        authors = await info.context.loaders.author(
+            get_projection(info, AuthorType)
+        ).load_many(self.author_ids)
+        authors = [convert_to_type(author, AuthorType) for author in authors if author]
 
         return authors
 
     @strawberry.field
-    def reviews(self) -> List["ReviewType"]:
-        """Gets a book's reviews"""
-
-        reviews = storage.review_get_all_records({"book_id": self.id})
-        reviews = [convert_to_type(review, ReviewType) for review in reviews]
-
-        return reviews
+    async def reviews(
+        self,
+        info: strawberry.Info[Context],
+        first: int = settings.GRAPHQL_DEFAULT_LIST_SIZE,
+        after: Optional[str] = None,
+        sort: ReviewSort = ReviewSort.OLDEST,
+    ) -> Connection["ReviewType"]:
+        """Gets a page of a book's reviews"""
+        first = check_page_size(first, "first")
+        reviews = await info.context.loaders.book_reviews(
+            get_connection_projection(info, ReviewType),
+            first=first,
+            after=None if after is None else decode_cursor(after, SORTS[sort]),
+            sort=sort,
+        ).load(self.id)
+
+        return build_connection(reviews, first, SORTS[sort], ReviewType)
 
 
 @strawberry.type
@@ -107,15 +161,24 @@ class AuthorType:
     gender: Optional[str]
 
     # Resolved
-    @strawberry.field(description="Gets the author's books")
-    def books(self) -> List[BookType]:
-        """Gets the author's books"""
-        filter = {"author_ids": self.id}
-        books = storage.book_get_all_records(filter=filter)
-
-        books = [convert_to_type(book, BookType) for book in books]
-
-        return books
+    @strawberry.field(description="Gets a page of the author's books")
+    async def books(
+        self,
+        info: strawberry.Info[Context],
+        first: int = settings.GRAPHQL_DEFAULT_LIST_SIZE,
+        after: Optional[str] = None,
+        sort: BookSort = BookSort.OLDEST,
+    ) -> Connection[BookType]:
+        """Gets a page of the author's books"""
+        first = check_page_size(first, "first")
+        books = await info.context.loaders.author_books(
+            get_connection_projection(info, BookType),
+            first=first,
+            after=None if after is None else decode_cursor(after, SORTS[sort]),
+            sort=sort,
+        ).load(self.id)
+
+        return build_connection(books, first, SORTS[sort], BookType)
 
 
 @strawberry.type
@@ -129,7 +192,15 @@ class ReviewType:
 
     # Resolved
     @strawberry.field
-    def user(self) -> UserType:
+    async def user(self, info: strawberry.Info[Context]) -> UserType:
         """Gets the user of a review"""
-        user = storage.user_verify_record({"_id": self.user_id})
+        user = await info.context.loaders.user(get_projection(info, UserType)).load(
+            self.user_id
+        )
+
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
         return convert_to_type(user, UserType)
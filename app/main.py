@@ -1,12 +1,73 @@
+import asyncio
+from contextlib import asynccontextmanager
+from logging import getLogger
+
 import graphql_router as graphql_router
-from api.v1.routers import author, book, health, review, user
+from api.v1.routers import author, book, export, health, metrics, review, user
+from core.authentication.hashing_pool import hashing_pool
 from core.config import settings
+from core.db_monitoring import pool_monitor
+from core.health import health_checks
+from core.logging_pipeline import logging_pipeline
+from core.metrics import MetricsMiddleware, metrics_registry
+from core.read_cache import read_cache
+from core.request_scope import RequestScopeMiddleware
+from core.storage import lazy_storage, storage
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi_pagination import add_pagination
+from graphql_schema.persisted_queries import persisted_queries
+
+
+async def sync_indexes():
+    """Builds the missing query indexes in the background so boot is not blocked"""
+    try:
+        await storage.sync_indexes()
+    except Exception as ex:
+        getLogger(__name__ + ".sync_indexes").error(ex)
+
+
+async def warm_up():
+    """Opens a first database connection so the first request does not wait for it"""
+    try:
+        await asyncio.wait_for(storage.ping(), settings.WARM_UP_TIMEOUT_SECONDS)
+    except Exception as ex:
+        getLogger(__name__ + ".warm_up").warning(f"Database warm up failed: {ex!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Every worker process starts its own logging thread and database
+    # client here, after a pre-fork server has forked it
+    logging_pipeline.start(settings)
+    lazy_storage.connect()
+
+    if settings.GRAPHQL_PERSISTED_QUERIES_PATH:
+        persisted_queries.load_allow_list(settings.GRAPHQL_PERSISTED_QUERIES_PATH)
+
+    await warm_up()
+    # Requests rely on the constraint indexes, such as the unique user
+    # emails, so the app does not start without them
+    await storage.create_constraint_indexes()
 
-app = FastAPI(title="Book Reviews", version=settings.RELEASE_ID)
+    background_tasks = [
+        asyncio.create_task(hashing_pool.warm_up()),
+        asyncio.create_task(health_checks.watch_loop_lag()),
+    ]
+    if settings.SYNC_INDEXES_ON_STARTUP:
+        background_tasks.append(asyncio.create_task(sync_indexes()))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    hashing_pool.shutdown()
+    lazy_storage.disconnect()
+    logging_pipeline.stop()
+
+
+app = FastAPI(title="Book Reviews", version=settings.RELEASE_ID, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,6 +76,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestScopeMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 
 add_pagination(app)
@@ -24,6 +88,7 @@ app.include_router(
 )
 
 app.include_router(router=health.router, prefix=settings.API_V1_STR, tags=["health"])
+app.include_router(router=metrics.router, prefix=settings.API_V1_STR, tags=["metrics"])
 
 app.include_router(router=user.router, prefix=settings.API_V1_STR, tags=["user"])
 app.include_router(router=author.router, prefix=settings.API_V1_STR, tags=["author"])
@@ -32,7 +97,21 @@ app.include_router(router=book.router, prefix=settings.API_V1_STR, tags=["book"]
 
 app.include_router(router=review.router, prefix=settings.API_V1_STR, tags=["review"])
 
+app.include_router(router=export.router, prefix=settings.API_V1_STR, tags=["export"])
+
 
 @app.get(path="/", include_in_schema=False)
 def refirect_to_docs() -> RedirectResponse:
     return RedirectResponse(url="/docs")
+
+
+@app.get(path="/metrics", include_in_schema=False)
+def get_metrics() -> PlainTextResponse:
+    """Gets the metrics of the process in the prometheus text format"""
+    content = metrics_registry.render(
+        ("graphql_persisted_queries", persisted_queries.stats()),
+        ("read_cache", read_cache.stats()),
+        ("mongo_pool", pool_monitor.stats()),
+    )
+
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
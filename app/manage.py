@@ -0,0 +1,117 @@
+"""
+Management commands for the book reviews service
+
+Usage:
+    python manage.py indexes [--check]
+    python manage.py repair-ratings
+    python manage.py import {authors,books,reviews} PATH [--checkpoint FILE] [--resume]
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from core.bulk_import import KINDS, BulkImporter
+from core.config import settings
+from core.logging_pipeline import logging_pipeline
+from core.mongo_storage import MongoStorage
+
+
+def indexes(args: argparse.Namespace) -> int:
+    """Reports and builds the indexes missing from the database"""
+    storage = MongoStorage(args.database)
+    reports = storage.sync_indexes(build=not args.check)
+
+    for report in reports:
+        print(report.model_dump_json())
+
+    return 0 if all(report.in_sync for report in reports) else 1
+
+
+def repair_ratings(args: argparse.Namespace) -> int:
+    """Recomputes the rating aggregates of every book from its reviews"""
+    storage = MongoStorage(args.database)
+    updated = storage.book_repair_rating_aggregates()
+
+    print(f"Updated the rating aggregates of {updated} books")
+
+    return 0
+
+
+def import_records(args: argparse.Namespace) -> int:
+    """Imports authors, books or reviews from a csv or newline delimited json file"""
+    checkpoint = args.checkpoint or args.path + ".checkpoint"
+    if not args.resume and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    importer = BulkImporter(
+        MongoStorage(args.database),
+        kind=args.kind,
+        source=os.path.abspath(args.path),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        checkpoint=checkpoint,
+    )
+    progress = importer.run()
+
+    print(progress.model_dump_json())
+    print(
+        f"Imported {progress.inserted} {args.kind} from {progress.position} records"
+        + f" in {progress.seconds:.1f}s ({progress.rate:,.0f} records/sec),"
+        + f" {progress.invalid} invalid, {progress.failed} failed"
+    )
+
+    return 0 if not progress.invalid and not progress.failed else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Book reviews management commands")
+    parser.add_argument(
+        "--database", default=settings.DATABSE_NAME, help="The database to use"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    indexes_parser = commands.add_parser("indexes", help=indexes.__doc__)
+    indexes_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report missing, extra and conflicting indexes",
+    )
+    indexes_parser.set_defaults(handler=indexes)
+
+    repair_ratings_parser = commands.add_parser(
+        "repair-ratings", help=repair_ratings.__doc__
+    )
+    repair_ratings_parser.set_defaults(handler=repair_ratings)
+
+    import_parser = commands.add_parser("import", help=import_records.__doc__)
+    import_parser.add_argument("kind", choices=KINDS, help="The records to import")
+    import_parser.add_argument("path", help="The csv or newline delimited json file")
+    import_parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Records written per batch"
+    )
+    import_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes validating the records",
+    )
+    import_parser.add_argument(
+        "--checkpoint", help="Progress file, defaults to PATH.checkpoint"
+    )
+    import_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue after the records imported by an interrupted run",
+    )
+    import_parser.set_defaults(handler=import_records)
+
+    args = parser.parse_args(argv)
+    logging_pipeline.start(settings)
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,83 @@
-from typing import Annotated, Optional
+from functools import lru_cache, partial
+from typing import Annotated, Callable, Dict, Optional, Type, TypeVar
 
-from pydantic import BeforeValidator
+from pydantic import BaseModel, BeforeValidator
 
 PyObjectId = Annotated[Optional[str], BeforeValidator(str)]
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def get_document_constructor(model: Type[M]) -> Callable[[Dict], M]:
+    """
+    Compiles the construction of a model from trusted documents read
+    from the db. Documents are written through validated models so only
+    the before validators converting stored values, such as object ids,
+    are applied and the model is built without validating it.
+    Fields missing from the document, such as those left out by a
+    projection, are set to their default or None
+    """
+    names = set(model.model_fields)
+    renamed = {}
+    converted = []
+    defaults = []
+    for name, field in model.model_fields.items():
+        if field.validation_alias:
+            renamed[field.validation_alias] = name
+
+        converters = [
+            metadata.func
+            for metadata in field.metadata
+            if isinstance(metadata, BeforeValidator)
+        ]
+        if converters:
+            converted.append((name, converters))
+
+        if field.is_required():
+            defaults.append((name, lambda: None))
+        else:
+            defaults.append(
+                (name, partial(field.get_default, call_default_factory=True))
+            )
+
+    def construct(document: Dict) -> M:
+        values = {renamed.get(key, key): value for key, value in document.items()}
+
+        for name, converters in converted:
+            if name in values:
+                value = values[name]
+                for converter in converters:
+                    value = converter(value)
+                values[name] = value
+
+        fields_set = names.intersection(values)
+        if len(fields_set) < len(names):
+            for name, default in defaults:
+                if name not in fields_set:
+                    values[name] = default()
+
+        instance = model.__new__(model)
+        object.__setattr__(instance, "__dict__", values)
+        object.__setattr__(instance, "__pydantic_fields_set__", fields_set)
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        return instance
+
+    return construct
+
+
+def construct_from_document(model: Type[M], document: Dict) -> M:
+    """Builds a model from a trusted document read from the db without validating it"""
+    return get_document_constructor(model)(document)
+
+
+def load_document(model: Type[M], document: Dict, projection: Optional[Dict]) -> M:
+    """
+    Builds a model from a document read from the db.
+    Documents loaded with a projection are partial so they are not validated
+    """
+    if projection is not None:
+        return construct_from_document(model, document)
+
+    return model(**document)
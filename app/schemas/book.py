@@ -1,11 +1,21 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, BeforeValidator, Field, computed_field, model_validator
 from schemas.base import PyObjectId
 from typing_extensions import Self
 
 
+def to_rating_histogram(value: Union[Dict[str, int], List[int]]) -> List[int]:
+    """Converts a stored histogram keyed by rating to counts for ratings 1 to 5"""
+    if isinstance(value, dict):
+        return [value.get(str(rating), 0) for rating in range(1, 6)]
+    return value
+
+
+RatingHistogram = Annotated[List[int], BeforeValidator(to_rating_histogram)]
+
+
 class Book(BaseModel):
     id: PyObjectId = Field(validation_alias="_id", default=None)
     isbn_10: Optional[str] = Field(min_length=10, max_length=10, default=None)
@@ -20,6 +30,16 @@ class Book(BaseModel):
     release_date: Optional[datetime]
     date_created: datetime
     date_modified: datetime
+    review_count: int = 0
+    rating_total: int = Field(default=0, exclude=True)
+    rating_histogram: RatingHistogram = [0, 0, 0, 0, 0]
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        if not self.review_count:
+            return None
+        return round(self.rating_total / self.review_count, 2)
 
     @model_validator(mode="after")
     def check_passwords_match(self) -> Self:
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -9,7 +10,16 @@ class Status(str, Enum):
     WARN = "warn"
 
 
+class Check(BaseModel):
+    component_type: str
+    observed_value: float
+    observed_unit: str
+    status: Status
+    output: Optional[str] = None
+
+
 class Health(BaseModel):
     status: Status
     version: str
     release_id: str
+    checks: Optional[Dict[str, List[Check]]] = None
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+
+class PersistedQueryStats(BaseModel):
+    size: int
+    max_size: int
+    allowed: int
+    allowed_only: bool
+    hits: int
+    misses: int
+    evictions: int
+    parse_validate_seconds_saved: float
+
+
+class ReadCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    invalidations: int
+
+
+class PoolStats(BaseModel):
+    max_pool_size: int
+    connections: int
+    checked_out: int
+    waiting: int
+    checkouts: int
+    checkout_failures: int
+    checkout_seconds: float
+    pools_cleared: int
@@ -0,0 +1,17 @@
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi_pagination import Page
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class CountedPage(Page[T], Generic[T]):
+    total_exact: bool = True
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_exact: Optional[bool] = None
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from schemas.base import PyObjectId
 
 
@@ -19,12 +19,21 @@ class Review(BaseModel):
 class ReviewIn(BaseModel):
     # user_id: str
     # book_id: str
-    rating: int
+    rating: int = Field(ge=1, le=5)
     title: Optional[str] = None
     content: Optional[str] = None
 
 
 class ReviewUpdate(BaseModel):
-    rating: int = 0
+    rating: Optional[int] = Field(default=None, ge=1, le=5)
     title: Optional[str] = None
     content: Optional[str] = None
+
+    @field_validator("rating")
+    @classmethod
+    def rating_not_null(cls, rating: Optional[int]) -> int:
+        # Only an unset rating is left unchanged, a null one can not be stored
+        if rating is None:
+            raise ValueError("rating can not be null")
+
+        return rating